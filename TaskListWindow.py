@@ -1,30 +1,25 @@
 # Standard library imports
-import os
+import time
 import webbrowser
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 
 # Third-party imports
 import pytz
-import requests
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import (
     QGuiApplication,
     QIcon,
-    QPixmap,
-    QPainter,
-    QBrush,
     QColor,
 )
 from PySide6.QtWidgets import (
-    QApplication,
     QHBoxLayout,
     QLabel,
     QLineEdit,
     QListWidgetItem,
     QMainWindow,
-    QTableWidget,
+    QTableView,
+    QAbstractItemView,
     QVBoxLayout,
     QWidget,
     QGroupBox,
@@ -34,19 +29,48 @@ from PySide6.QtWidgets import (
     QSizePolicy,
     QHeaderView,
     QGraphicsDropShadowEffect,
+    QProgressBar,
 )
-from google.auth.exceptions import RefreshError
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 
 # Local imports
+from google_services import LazyService, load_credentials, save_credentials
 from task_list_sidebar import TaskListSidebar
 from motivation import get_motivational_phrase
 from stylesheet import UI_STYLESHEET
 from menu import TaskListMenu
 from task_details_panel import TaskDetailsPanel
+from task_cache import CACHE_MAX_AGE, TaskCache
+from youtube_cache import YouTubeCache, prefetch_videos
+from image_cache import ImageCache, circular_image
+from task_sync import TaskSync
+from task_list_directory import TaskListDirectory
+from task_mutations import TaskMutations
+from session_snapshot import SessionSnapshot
+from mutation_outbox import MutationOutbox
+from http_pool import HttpPool, ParallelFetcher
+from tasks_client import TasksClient
+from task_batch import TaskBatcher
+from task_prefetch import TaskListPrefetcher
+from task_fields import DETAIL_TASK_FIELDS, EXPORT_TASKS_PAGE_FIELDS
+from workers import LOCAL_PRIORITY, SingleFlight, TaskRunner
+from task_table_model import (
+    TITLE_COLUMN,
+    HighlightDelegate,
+    TaskTableModel,
+    TaskFilterProxyModel,
+)
+from task_record import DAY_MS, Task, parse_timestamp
+from search_index import IndexedTasks, index_tasks
+from date_buckets import COMPLETED, OVERDUE, TODAY, UPCOMING, DateBucketIndex
+
+# Timezone in which "today" is evaluated by the date filters
+USER_TZ = pytz.timezone("America/New_York")  # Replace with your timezone
+
+# How far back the "Recently completed" filter goes
+RECENTLY_COMPLETED_DAYS = 7
+
+# Delay after the last keystroke before the search bar text is applied
+SEARCH_DEBOUNCE_MS = 150
 
 SCOPES = [
     "https://www.googleapis.com/auth/tasks", 
@@ -57,6 +81,22 @@ SCOPES = [
 ]
 
 
+def local_day_start() -> int:
+    """
+    Returns the start of the current day in USER_TZ, as the date index expects.
+
+    Due dates carry no time and are stored as UTC midnight, so this is the
+    UTC midnight of the local date, in epoch milliseconds.
+    """
+    current_date = datetime.now(USER_TZ).date()
+    return parse_timestamp(current_date.isoformat() + "T00:00:00Z")
+
+
+def recently_completed_min() -> int:
+    """Returns the lower bound of the "Recently completed" filter in epoch milliseconds."""
+    return int(time.time() * 1000) - RECENTLY_COMPLETED_DAYS * DAY_MS
+
+
 class TaskListWindow(QMainWindow):
     """Main window to display and manage user tasks."""
 
@@ -67,59 +107,85 @@ class TaskListWindow(QMainWindow):
         :param app: The QApplication reference.
         """
         self.app = app
-        self.is_fetching_tasks = False  # Add a flag to track task fetching
-        # Load Google Tasks API
-        if os.path.exists("credentials/token.json"):
-            self.creds = Credentials.from_authorized_user_file(
-                "credentials/token.json", SCOPES
-            )
-            if not self.creds or not self.creds.valid:
-                print("Creds invalid")
-                if self.creds and self.creds.expired and self.creds.refresh_token:
-                    print("Refreshing token")
-                    self.creds.refresh(Request())
-                else:
-                    print("Getting new token")
-                    flow = InstalledAppFlow.from_client_secrets_file(
-                        "credentials/credentials.json", SCOPES
-                    )
-                    self.creds = flow.run_local_server(port=0)
-                # Save the credentials for the next run
-                with open("credentials/token.json", "w") as token:
-                    token.write(self.creds.to_json())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                "credentials/credentials.json", SCOPES
-            )
-            self.creds = flow.run_local_server(port=0)
-            with open("credentials/token.json", "w") as token:
-                token.write(self.creds.to_json())
-
-        self.tasks_service = build("tasks", "v1", credentials=self.creds)
-        # Load Google Sheets API
-        self.sheets_service = build("sheets", "v4", credentials=self.creds)
-        # Load User Profile API
-        self.profile_service = build("oauth2", "v2", credentials=self.creds)
+        self.creds = load_credentials(SCOPES)
+        # Google Tasks over pooled keep-alive connections
+        self.tasks_client = TasksClient(self.creds)
+        # The other services are built on first use
+        self.sheets_service = LazyService("sheets", "v4", credentials=self.creds)
+        self.profile_service = LazyService("oauth2", "v2", credentials=self.creds)
+        # Local cache of task lists and tasks
+        self.task_cache = TaskCache()
+        # Per-thread HTTP transports for requests made off the GUI thread
+        self.http_pool = HttpPool(self.creds)
+        self.task_batcher = TaskBatcher(
+            self.tasks_client, self.http_pool, ParallelFetcher(self.http_pool)
+        )
+        # Avatar and thumbnails, in memory and on disk
+        self.image_cache = ImageCache()
+        # YouTube details of the videos linked from tasks
+        self.video_cache = YouTubeCache()
+        # Tasks of the cache split by due date, for the filter buttons
+        self.date_index = DateBucketIndex(self.task_cache)
+        self.task_sync = TaskSync(
+            self.tasks_client, self.task_cache, self.task_batcher, self.date_index
+        )
+        # When every task list was last synced, see sync_all_task_lists
+        self.all_task_lists_synced_at = 0
+        # Joins the filters asking for the sync of every list at the same time
+        self.sync_flights = SingleFlight()
+        # What the previous session showed, drawn before any API call
+        self.session_snapshot = SessionSnapshot()
+        self.snapshot = self.session_snapshot.load()
+        # The profile of the signed in user, once known
+        self.user_info = self.snapshot.get("user_info")
         super().__init__()
+        # The task lists shown in the sidebar and the "Move to" combo box
+        self.task_list_directory = TaskListDirectory(
+            self.tasks_client, self.http_pool, self.task_cache, self.date_index, self
+        )
+        # Runs API calls off the GUI thread
+        self.runner = TaskRunner(self)
+        # Syncs the task lists in the background before they are opened
+        self.task_prefetcher = TaskListPrefetcher(
+            self.runner,
+            self.task_sync,
+            self.task_cache,
+            self.task_list_directory,
+            self.snapshot.get("recent_task_lists", ()),
+            self,
+        )
         self.initUI()
         self.apply_shadows()  # Add this line
+        self.task_list_directory.task_lists_changed.connect(self.show_task_lists)
+        self.task_list_directory.task_lists_changed.connect(
+            self.details_panel.show_task_lists
+        )
+        # Changes waiting to be sent, kept across restarts
+        self.outbox = MutationOutbox(self.runner, self.task_batcher, parent=self)
+        self.outbox.pending_changed.connect(self.show_pending_changes)
+        # Edits, completes, deletes and moves tasks without reloading them
+        self.task_mutations = TaskMutations(
+            self.outbox,
+            self.task_cache,
+            self.date_index,
+            self.task_model,
+            self.task_list_sidebar,
+            self,
+        )
+        self.task_mutations.tasks_changed.connect(self.show_task_changes)
+        self.show_snapshot()
 
     def get_user_info(self):
-        user_info = self.profile_service.userinfo().get().execute()
+        user_info = (
+            self.profile_service.userinfo().get().execute(http=self.http_pool.http())
+        )
         return user_info
 
     def refresh_token(self):
-        # Check if the token has expired
+        """Refresh an expired access token and save it. Blocks on the network."""
         if not self.creds.valid:
-            # Refresh the token
-            try:
-                self.creds.refresh_grant(Request())
-            except RefreshError as e:
-                # Token has expired, refresh it
-                print(f"Token has expired: {e}")
-                self.creds.refresh_grant(Request())
-            with open("credentials/token.json", "w") as token:
-                token.write(self.creds.to_json())
+            self.http_pool.ensure_valid_credentials()
+            save_credentials(self.creds)
 
     def initUI(self):
         """Initialize the user interface components."""
@@ -135,6 +201,7 @@ class TaskListWindow(QMainWindow):
         self.create_vertical_layout()
         self.menu = TaskListMenu(self)  # Replace create_menu() with this line
         self.create_refresh_button()
+        self.create_status_bar()
         self.setStyleSheet(UI_STYLESHEET)
 
     def center_window(self) -> None:
@@ -151,46 +218,19 @@ class TaskListWindow(QMainWindow):
         """Create the sidebar layout which includes the user info and task list."""
         # Create a sidebar for task lists
         self.task_list_sidebar = TaskListSidebar(window=self)
-        # Fetch user info, email
-        user_info = self.get_user_info()
         self.user_avatar_label = QLabel()
         self.user_avatar_label.setObjectName("userAvatar")
-        # Fetch the image data from the URL
-        image_url = self.profile_service.userinfo().get().execute()["picture"]
-        response = requests.get(image_url)
-        image_data = response.content  # Get the image data as bytes
-
-        pixmap = QPixmap()
-        pixmap.loadFromData(image_data)
-
-        # Create a circular mask
-        mask = QPixmap(pixmap.size())
-        mask.fill(Qt.transparent)
-        painter = QPainter(mask)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(QBrush(Qt.white))
-        painter.setPen(Qt.NoPen)
-        painter.drawEllipse(0, 0, pixmap.width(), pixmap.height())
-        painter.end()
-
-        # Apply the mask to the pixmap
-        pixmap.setMask(mask.mask())
-
-        self.user_avatar_label.setPixmap(
-            pixmap.scaled(46, 46, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        )
         self.user_avatar_label.setFixedSize(
             54, 54
         )  # Ensure the label is a square and accounts for the border
         self.user_avatar_label.setStyleSheet("")  # Remove inline style
 
-        self.user_name_label = QLabel(user_info["name"])
+        self.user_name_label = QLabel("Loading...")
         self.user_name_label.setObjectName("userName")  # Add object name for styling
         self.user_name_label.setWordWrap(False)
         self.user_name_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
         self.user_name_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
         self.user_name_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        self.user_name_label.setToolTip(user_info["name"])  # Show full name on hover
 
         # Create a layout for the user info
         self.user_info_layout = QHBoxLayout()
@@ -224,6 +264,28 @@ class TaskListWindow(QMainWindow):
         # Connect the currentItemChanged signal to the refresh_tasks method
         self.task_list_sidebar.currentItemChanged.connect(self.refresh_tasks)
 
+    def show_user_profile(self, user_info):
+        """
+        Displays the user name once fetched, and the circular avatar once loaded.
+
+        The avatar is cached already scaled and masked, so it is only
+        downloaded again when it changes.
+
+        Args:
+            user_info (dict): The user info dictionary
+        """
+        self.user_info = user_info
+        self.image_cache.request_pixmap(
+            self.runner,
+            "avatar",
+            user_info["picture"],
+            "avatar-46",
+            circular_image(46),
+            self.user_avatar_label.setPixmap,
+        )
+        self.user_name_label.setText(user_info["name"])
+        self.user_name_label.setToolTip(user_info["name"])  # Show full name on hover
+
     def create_filter_group_box(self):
         """Create and configure a group box containing radio buttons for filtering."""
         # Create a group box for filter options
@@ -241,6 +303,14 @@ class TaskListWindow(QMainWindow):
         self.overdue_radio_button = QRadioButton("Overdue")
         self.recently_completed_radio_button = QRadioButton("Recently completed")
         self.all_radio_button = QRadioButton("All")  # Add new radio button
+        # Filters by the name they are saved under in the session snapshot
+        self.filter_buttons = {
+            "today": self.today_radio_button,
+            "next_days": self.next_days_radio_button,
+            "overdue": self.overdue_radio_button,
+            "recently_completed": self.recently_completed_radio_button,
+            "all": self.all_radio_button,
+        }
 
         # Connect the toggled signal to the filter_tasks method
         self.today_radio_button.toggled.connect(self.filter_tasks)
@@ -276,18 +346,33 @@ class TaskListWindow(QMainWindow):
         """Set up the QLineEdit for searching tasks."""
         # Create a search bar
         self.search_bar = QLineEdit()
-        self.search_bar.setPlaceholderText("Search tasks...")
+        self.search_bar.setPlaceholderText(
+            "Search tasks... (Enter searches all lists)"
+        )
         self.search_bar.textChanged.connect(self.search_tasks)
+        self.search_bar.returnPressed.connect(self.search_all_tasks)
         self.main_layout.addWidget(self.search_bar)
 
+        # Apply the search once typing pauses rather than on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.apply_search)
+
     def create_task_table(self) -> None:
-        """Creates and configures the main task table widget."""
-        self.task_table = QTableWidget()
-        self.task_table.setRowCount(0)
-        # Only two columns now: Title and Due Date
-        self.task_table.setColumnCount(2)
-        headers = ["Title", "Last Updated"]
-        self.task_table.setHorizontalHeaderLabels(headers)
+        """Creates and configures the main task table view and its models."""
+        # Two columns: Title and Last Updated
+        self.task_model = TaskTableModel(self)
+        self.task_proxy_model = TaskFilterProxyModel(self)
+        self.task_proxy_model.setSourceModel(self.task_model)
+        self.task_table = QTableView()
+        self.task_table.setModel(self.task_proxy_model)
+        self.task_table.setItemDelegateForColumn(
+            TITLE_COLUMN, HighlightDelegate(self.task_table)
+        )
+        self.task_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # Shift and Ctrl select several tasks for the bulk actions
+        self.task_table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.task_table.setAlternatingRowColors(True)
         self._configure_table_headers()
         self.main_layout.addWidget(self.task_table)
@@ -340,9 +425,6 @@ class TaskListWindow(QMainWindow):
         self.central_widget.layout().insertWidget(0, self.motivational_phrase_label)
 
     def resizeEvent(self, event):
-        # Get the total number of columns
-        column_count = self.task_table.columnCount()
-
         # Calculate the width for the title column (30% of the main content area)
         main_content_width = event.size().width() - 200  # Adjust the sidebar width
         title_column_width = int(main_content_width * 0.4)
@@ -386,147 +468,320 @@ class TaskListWindow(QMainWindow):
 
     def search_tasks(self, text):
         """
-        Filters the tasks based on the entered criteria.
+        Schedules filtering the tasks by the entered text.
+
+        Restarts the debounce timer, so a burst of keystrokes triggers a
+        single search.
         Args:
             text (str): The criteria to filter the tasks by.
         """
-        text = text.lower()  # Convert the search text to lowercase
-        for row in range(self.task_table.rowCount()):
-            title = (
-                self.task_table.item(row, 0).text().lower()
-            )  # Convert the title to lowercase
-            if text not in title:
-                self.task_table.hideRow(row)
-            else:
-                self.task_table.showRow(row)
+        self.search_timer.start()
+
+    def apply_search(self):
+        """Filters the tasks by the search bar text, using the search index."""
+        self.task_proxy_model.set_search_text(self.search_bar.text())
+
+    def search_all_tasks(self):
+        """
+        Searches the search bar text in every cached task list.
+
+        The local full-text index covers titles and notes of all lists,
+        completed history included, so nothing is fetched from the API.
+        Results replace the table contents, best match first.
+        """
+        text = self.search_bar.text()
+        if not text.strip():
+            return
+        self.search_timer.stop()
+        self.uncheck_radio_buttons()
+        self.runner.run(
+            "tasks",
+            lambda: self.fetch_search_results(text),
+            on_result=self.show_search_results,
+            key=("search", text),
+        )
+
+    def fetch_search_results(self, text):
+        """
+        Runs a full-text search of the task cache.
+
+        Runs off the GUI thread, so it must not touch any widget.
+
+        Args:
+            text (str): The text to search for
+
+        Returns:
+            Tuple[IndexedTasks, Dict[str, str]]: The matching tasks and their
+            search highlights by task ID
+        """
+        hits = self.task_cache.search(text)
+        highlights = {hit.task.id: hit.highlight for hit in hits}
+        return index_tasks([hit.task for hit in hits]), highlights
+
+    def show_search_results(self, results):
+        """
+        Displays the results of fetch_search_results.
 
-    def filter_tasks(self):
+        Args:
+            results (Tuple[IndexedTasks, Dict[str, str]]): The search results
+        """
+        indexed_tasks, highlights = results
+        # The results already match the text, as words rather than substring
+        self.task_proxy_model.set_search_text("")
+        self.task_list_sidebar.render_tasks(indexed_tasks, highlights)
+        self.statusBar().showMessage(
+            f"{len(indexed_tasks.tasks)} tasks found in all lists", 5000
+        )
+
+    def filter_tasks(self, checked: bool = True):
         """
         Filters the tasks based on the selected filter.
+
+        The tasks are fetched and filtered in the background; a newer filter
+        or task list selection supersedes a pending one, and asking again
+        for the pending filter does not start another fetch.
+
+        Args:
+            checked (bool): The state of the toggled radio button; switching
+                filters also unchecks the previous one, which is ignored
         """
-        if self.is_fetching_tasks:
-            print("Task fetching is already in progress. Skipping this request.")
+        if not checked:
+            return
+        selected_button = self.radio_button_group.checkedButton()
+        if selected_button is None:
+            # If no radio button is checked, do nothing
             return
 
-        self.is_fetching_tasks = True
-        self.set_waiting_cursor()
-        # Get the current date in the user's timezone
-        user_tz = pytz.timezone("America/New_York")  # Replace with your timezone
-        current_date = datetime.now(user_tz).date()
-
-        # Filter tasks based on the selected filter
-        # Do it separately because we are changing the headers
-        if self.recently_completed_radio_button.isChecked():
-            all_tasks = self.fetch_all_tasks(completed=True)
-            filtered_tasks = [
-                task for task in all_tasks if task["status"] == "completed"
-            ]
-            print(f"Filtered {len(filtered_tasks)} completed tasks")
-            # Update table headers for completed tasks
-            self.task_table.setHorizontalHeaderLabels(
-                ["Title", "Updated", "Completed", "Notes", "Priority"]
-            )
-        elif (
-            self.all_radio_button.isChecked()
-            or self.today_radio_button.isChecked()
-            or self.next_days_radio_button.isChecked()
-            or self.overdue_radio_button.isChecked()
-        ):
-            all_tasks = self.fetch_all_tasks()
-            # Reset table headers for other filters
-            self.task_table.setHorizontalHeaderLabels(
-                ["Title", "Updated", "Due Date", "Notes", "Priority"]
+        view = ("filter", self.filter_name(selected_button))
+        # Partial results would drop rows of the tasks already shown
+        if view == self.task_list_sidebar.shown_view:
+            self.runner.run(
+                "tasks",
+                lambda: index_tasks(self.fetch_filtered_tasks(selected_button)),
+                on_result=lambda indexed_tasks: self.show_filtered_tasks(
+                    indexed_tasks, selected_button
+                ),
+                on_error=self.show_load_error,
+                key=view,
             )
-        # Filter tasks based on the selected filter
-        if self.all_radio_button.isChecked():  # Add new condition for All filter
-            filtered_tasks = all_tasks  # Show all tasks without filtering
-        elif self.today_radio_button.isChecked():
-            filtered_tasks = [
-                task
-                for task in all_tasks
-                if "due" in task
-                and datetime.strptime(task["due"], "%Y-%m-%dT%H:%M:%S.%fZ").date()
-                == current_date
-            ]
-        elif self.next_days_radio_button.isChecked():
-            seven_days_from_now = current_date + timedelta(days=7)
-            filtered_tasks = [
-                task
-                for task in all_tasks
-                if "due" in task
-                and current_date
-                <= datetime.strptime(task["due"], "%Y-%m-%dT%H:%M:%S.%fZ").date()
-                <= seven_days_from_now
-            ]
-        elif self.overdue_radio_button.isChecked():
-            filtered_tasks = [
-                task
-                for task in all_tasks
-                if "due" in task
-                and datetime.strptime(task["due"], "%Y-%m-%dT%H:%M:%S.%fZ").date()
-                < current_date
-            ]
-            pass
-        elif (
-            not self.all_radio_button.isChecked()  # Add new button to check
-            and not self.today_radio_button.isChecked()
-            and not self.next_days_radio_button.isChecked()
-            and not self.overdue_radio_button.isChecked()
-            and not self.recently_completed_radio_button.isChecked()
-        ):
-            # If no radio button is checked, do nothing
-            self.reset_cursor()
-            self.is_fetching_tasks = False
             return
+        self.runner.run(
+            "tasks",
+            lambda report: index_tasks(
+                self.fetch_filtered_tasks(selected_button, report)
+            ),
+            on_result=lambda indexed_tasks: self.show_filtered_tasks(
+                indexed_tasks, selected_button
+            ),
+            on_error=self.show_load_error,
+            on_progress=lambda indexed_tasks: self.task_list_sidebar.show_partial_tasks(
+                indexed_tasks, view=view
+            ),
+            key=view,
+        )
 
-        # Get the selected radio button
-        selected_button = self.radio_button_group.checkedButton()
+    def fetch_filtered_tasks(self, selected_button, report=None):
+        """
+        Fetches the tasks matching a filter, ordered for display.
+
+        Runs off the GUI thread, so it must not touch any widget.
+
+        Args:
+            selected_button (QRadioButton): The radio button of the filter
+            report: Optional callable taking IndexedTasks of the matching
+                tasks known so far while syncing: the cached ones, then
+                more as the pages of lists downloaded for the first time
+                arrive
+
+        Returns:
+            List[Task]: The filtered tasks
+        """
+        if report is None or not self.is_sync_due():
+            self.sync_all_task_lists()
+            return self.filtered_tasks(selected_button)
+
+        shown = self.filtered_tasks(selected_button)
+        if shown:
+            report(index_tasks(shown))
+
+        def page_loaded(_):
+            nonlocal shown
+            # Pages only add tasks, so the same count means no new match
+            tasks = self.filtered_tasks(selected_button)
+            if len(tasks) != len(shown):
+                shown = tasks
+                report(IndexedTasks(tasks, None))
+
+        self.sync_all_task_lists(on_page=page_loaded)
+        return self.filtered_tasks(selected_button)
+
+    def filtered_tasks(self, selected_button):
+        """
+        Returns the cached tasks matching a filter, ordered for display.
+
+        Unlike fetch_filtered_tasks, nothing is synced with the API first.
+        Runs off the GUI thread, so it must not touch any widget.
+
+        Args:
+            selected_button (QRadioButton): The radio button of the filter
 
+        Returns:
+            List[Task]: The filtered tasks
+        """
+        self.load_date_index()
+        # Every filter but "All" reads a bucket of the date index, already
+        # filtered and sorted
+        if selected_button == self.all_radio_button:
+            return self.date_index.visible_tasks()
+        if selected_button == self.today_radio_button:
+            return self.date_index.tasks_in(TODAY)
         if selected_button == self.next_days_radio_button:
-            filtered_tasks = self.order_tasks_by_due_date(
-                filtered_tasks, ascending=True
-            )
-        elif selected_button == self.overdue_radio_button:
-            filtered_tasks = self.order_tasks_by_due_date(
-                filtered_tasks, ascending=False
-            )
-        elif selected_button == self.recently_completed_radio_button:
-            filtered_tasks = self.order_tasks_by_completed_date(
-                filtered_tasks, ascending=False
-            )
+            return self.date_index.tasks_in(TODAY, UPCOMING)
+        if selected_button == self.overdue_radio_button:
+            return self.date_index.tasks_in(OVERDUE)
+        completed_tasks = self.date_index.completed_since(recently_completed_min())
+        print(f"Filtered {len(completed_tasks)} completed tasks")
+        return completed_tasks
+
+    def show_filtered_tasks(self, indexed_tasks, selected_button):
+        """
+        Displays the result of fetch_filtered_tasks.
 
-        self.task_list_sidebar.render_tasks(filtered_tasks)
+        Args:
+            indexed_tasks (IndexedTasks): The filtered tasks
+            selected_button (QRadioButton): The radio button of the filter
+        """
+        self.task_list_sidebar.render_tasks(
+            indexed_tasks, view=("filter", self.filter_name(selected_button))
+        )
+        self.prefetch_youtube_videos(indexed_tasks.tasks)
+        self.update_filter_counts()
 
-        self.reset_cursor()
-        self.is_fetching_tasks = False
+    def show_load_error(self, error: Exception) -> None:
+        """
+        Reports a failure to load the tasks of a view.
 
-    def order_tasks_by_due_date(self, tasks, ascending):
+        Args:
+            error (Exception): The error raised by the background job
+        """
+        self.show_loading_more(None)
+        print(f"Error loading tasks: {error}")
+
+    def show_loading_more(self, count: Optional[int]) -> None:
+        """
+        Shows or hides the indicator of a view still loading.
+
+        Args:
+            count (Optional[int]): The number of tasks shown so far, or None
+                once the view is complete
         """
-        Sorts the given tasks by their 'due' field, returning the ordered list.
-        Tasks with no due date are placed at the end.
+        if count is not None:
+            shown = "1 task" if count == 1 else f"{count} tasks"
+            self.loading_more_label.setText(f"{shown} shown, loading more...")
+        self.loading_more_label.setVisible(count is not None)
+
+    def prefetch_youtube_videos(self, tasks):
+        """
+        Looks up in the background the YouTube videos linked from tasks.
+
+        Their details are then read from the cache when a task is selected.
+
+        Args:
+            tasks (List[Task]): The tasks just displayed
         """
-        tasks_with_due = [t for t in tasks if "due" in t and t["due"]]
-        tasks_without_due = [t for t in tasks if not ("due" in t and t["due"])]
-        tasks_with_due.sort(
-            key=lambda t: datetime.strptime(t["due"], "%Y-%m-%dT%H:%M:%S.%fZ"),
-            reverse=not ascending,
+        self.runner.run(
+            "youtube_prefetch", lambda: prefetch_videos(tasks, self.video_cache)
         )
-        return tasks_with_due + tasks_without_due
 
-    def order_tasks_by_completed_date(self, tasks, ascending):
+    def filter_name(self, button: QRadioButton) -> Optional[str]:
         """
-        Sorts the given tasks by their completion date (in 'completed'),
-        returning the ordered list. Tasks with no completed date are last.
+        Returns the name of a filter in the session snapshot.
+
+        Args:
+            button (QRadioButton): The radio button of the filter
         """
-        tasks_with_completed = [t for t in tasks if "completed" in t and t["completed"]]
-        tasks_without_completed = [
-            t for t in tasks if not ("completed" in t and t["completed"])
-        ]
-        tasks_with_completed.sort(
-            key=lambda t: datetime.strptime(t["completed"], "%Y-%m-%dT%H:%M:%S.%fZ"),
-            reverse=not ascending,
+        for name, filter_button in self.filter_buttons.items():
+            if filter_button is button:
+                return name
+        return None
+
+    def load_date_index(self) -> None:
+        """
+        Fills the date index from the cache, or moves it to the current day.
+
+        Runs off the GUI thread.
+        """
+        today_start = local_day_start()
+        if self.date_index.is_loaded:
+            self.date_index.roll_to(today_start)
+        else:
+            self.date_index.load(today_start)
+
+    def update_filter_counts(self):
+        """Shows the number of tasks of each date filter on its radio button."""
+        if not self.date_index.is_loaded:
+            return
+        self.show_filter_counts(
+            self.date_index.counts(completed_min=recently_completed_min())
         )
-        return tasks_with_completed + tasks_without_completed
+
+    def show_filter_counts(self, counts: Dict[str, int]) -> None:
+        """
+        Shows counts of tasks on the date filter radio buttons.
+
+        Args:
+            counts (Dict[str, int]): The number of tasks by date bucket
+        """
+        self.today_radio_button.setText(f"Today ({counts[TODAY]})")
+        self.next_days_radio_button.setText(
+            f"Next 7 Days ({counts[TODAY] + counts[UPCOMING]})"
+        )
+        self.overdue_radio_button.setText(f"Overdue ({counts[OVERDUE]})")
+        self.recently_completed_radio_button.setText(
+            f"Recently completed ({counts[COMPLETED]})"
+        )
+
+    def show_task_changes(self, task_ids: List[str]) -> None:
+        """
+        Follows local changes of tasks in the filter counts and the details panel.
+
+        Args:
+            task_ids (List[str]): The IDs of the changed tasks
+        """
+        self.update_filter_counts()
+        self.details_panel.refresh_tasks(task_ids)
+
+    def schedule_day_rollover(self):
+        """Arms the timer moving the date index to the next day at local midnight."""
+        now = datetime.now(USER_TZ)
+        midnight = USER_TZ.localize(
+            datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        )
+        # A second of margin so the new day has started when the timer fires
+        self.day_timer.start(int((midnight - now).total_seconds() * 1000) + 1000)
+
+    def roll_day(self):
+        """Re-splits the date index for the new day, in the background."""
+        self.runner.run(
+            "date_index",
+            lambda: self.date_index.roll_to(local_day_start()),
+            on_result=self.show_rolled_day,
+        )
+        self.schedule_day_rollover()
+
+    def show_rolled_day(self, changed):
+        """
+        Refreshes the counts and the current date filter after a day change.
+
+        Args:
+            changed (bool): Whether the date index moved to another day
+        """
+        if not changed:
+            return
+        self.update_filter_counts()
+        checked_button = self.radio_button_group.checkedButton()
+        if checked_button is not None and checked_button != self.all_radio_button:
+            self.filter_tasks()
 
     def refresh_tasks(self, current_item: Optional[QListWidgetItem] = None) -> None:
         """
@@ -535,210 +790,306 @@ class TaskListWindow(QMainWindow):
         Args:
             current_item (Optional[QListWidgetItem]): The currently selected item
         """
-        self.set_waiting_cursor()
+        self.load_current_task_list(current_item)
+
+    def force_refresh_tasks(self) -> None:
+        """Syncs the current task list with the API even if the cache is fresh."""
+        self.load_current_task_list(force=True)
+
+    def load_current_task_list(
+        self, current_item: Optional[QListWidgetItem] = None, force: bool = False
+    ) -> None:
+        """
+        Loads and renders the given or the current task list.
+
+        Args:
+            current_item (Optional[QListWidgetItem]): The item to load, if any
+            force (bool): If True, sync even if the local cache is fresh
+        """
         if current_item:
             # Get the ID of the task list associated with the current item
             task_list_id = current_item.data(Qt.UserRole)
         else:
             task_list_id = self.task_list_sidebar.current_tasklist_id
         # Refresh the tasks associated with this task list
-        self.task_list_sidebar.load_tasks_by_task_list(task_list_id)
-        self.reset_cursor()
+        self.task_list_sidebar.load_tasks_by_task_list(task_list_id, force=force)
 
     def create_refresh_button(self):
         self.refresh_button = QPushButton("Refresh")
         self.refresh_button.setEnabled(False)
         # Remove inline style, using id selector instead
         self.refresh_button.setObjectName("refreshButton")
-        self.refresh_button.clicked.connect(self.refresh_tasks)
+        self.refresh_button.clicked.connect(self.force_refresh_tasks)
         self.main_layout.addWidget(self.refresh_button)
 
-    def load_task_lists(self):
+    def create_status_bar(self):
+        """Create the status bar with an indicator of background activity."""
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)  # Busy indicator
+        self.progress_bar.setMaximumWidth(150)
+        self.progress_bar.setVisible(False)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.runner.busy_changed.connect(self.progress_bar.setVisible)
+        # Progress of a view rendered page by page, see show_loading_more
+        self.loading_more_label = QLabel()
+        self.loading_more_label.setVisible(False)
+        self.statusBar().addPermanentWidget(self.loading_more_label)
+        # Number of changes not sent to Google Tasks yet
+        self.pending_changes_label = QLabel()
+        self.pending_changes_label.setVisible(False)
+        self.statusBar().addPermanentWidget(self.pending_changes_label)
+
+    def show_pending_changes(self, count: int) -> None:
         """
-        Loads the task lists from the Google Tasks API and displays them in the sidebar.
+        Shows how many changes wait in the outbox, e.g. while offline.
 
-        This method fetches the task lists from the API, handles any refresh errors,
-        and then adds each task list as an item to the sidebar. The ID of each task list
-        is stored as the item's data using the `Qt.UserRole` role.
+        Args:
+            count (int): The number of changes not sent yet
         """
-        page_token = None
-        while True:
-            try:
-                # Attempt to fetch the task lists from the API
-                tasklists_response = (
-                    self.tasks_service.tasklists().list(pageToken=page_token).execute()
-                )
-            except RefreshError as e:
-                # If the token has expired, refresh it and retry the request
-                print("Token has expired: {}".format(e))
-                self.refresh_token()
-                tasklists_response = (
-                    self.tasks_service.tasklists().list(pageToken=page_token).execute()
-                )
-
-            # Extract the list of task lists from the response
-            task_lists = tasklists_response.get("items", [])
-            for task_list in task_lists:
-                # Create a new list item for the task list
-                item = QListWidgetItem(task_list["title"])
+        self.pending_changes_label.setText(
+            "1 change not sent yet" if count == 1 else f"{count} changes not sent yet"
+        )
+        self.pending_changes_label.setVisible(count > 0)
 
-                # Store the task list ID as the item's data using Qt.UserRole
-                item.setData(Qt.UserRole, task_list["id"])
+    def load_task_lists(self):
+        """
+        Shows the cached task lists in the sidebar, then refreshes them from the API.
 
-                # Add the item to the sidebar
-                self.task_list_sidebar.addItem(item)
+        The lists are fetched in the background by the task list directory,
+        whose task_lists_changed signal updates the sidebar when they differ
+        from the cached ones. Their tasks are then prefetched.
+        """
+        self.show_task_lists(self.task_list_directory.task_lists())
+        self.runner.run(
+            "task_lists",
+            lambda: self.task_list_directory.fetch(max_age=0),
+            on_result=self.task_prefetcher.prefetch,
+            on_error=lambda e: print(f"Error loading task lists: {e}"),
+        )
 
-            page_token = tasklists_response.get("nextPageToken")
-            if not page_token:
-                break
+    def show_task_lists(self, task_lists: List[Dict[str, Any]]) -> None:
+        """
+        Replaces the task lists of the sidebar, keeping the selected one selected.
 
-    def fetch_non_completed_tasks(self) -> List[Dict[str, Any]]:
+        Args:
+            task_lists (List[Dict[str, Any]]): The task list resources
         """
-        Fetches all non-completed tasks from all task lists.
+        sidebar = self.task_list_sidebar
+        current_item = sidebar.currentItem()
+        current_id = current_item.data(Qt.UserRole) if current_item else None
+        # Rebuilding must not look like a new selection
+        sidebar.blockSignals(True)
+        sidebar.clear()
+        for task_list in task_lists:
+            # Create a new list item for the task list
+            item = QListWidgetItem(task_list["title"])
+
+            # Store the task list ID as the item's data using Qt.UserRole
+            item.setData(Qt.UserRole, task_list["id"])
+
+            # Add the item to the sidebar
+            sidebar.addItem(item)
+            if task_list["id"] == current_id:
+                sidebar.setCurrentItem(item)
+        sidebar.blockSignals(False)
+
+    def fetch_non_completed_tasks(self) -> List[Task]:
+        """
+        Fetches all non-completed tasks from all task lists, for exports.
+
+        Unlike the views, which read the cache synced with only the fields
+        they show, exports download the full task resources.
 
         Returns:
-            List[Dict[str, Any]]: A list of task dictionaries containing task details
+            List[Task]: The non-completed tasks
         """
         print("Fetching non-completed tasks...")
-        all_tasks = []
-        task_lists = self.tasks_service.tasklists().list().execute().get("items", [])
-
-        def fetch_non_completed_tasks_for_list(task_list):
-            tasks = []
-            page_token = None
-            while True:
-                try:
-                    response = (
-                        self.tasks_service.tasks()
-                        .list(tasklist=task_list["id"], pageToken=page_token)
-                        .execute()
-                    )
-                    non_completed_tasks = [
-                        {
-                            "tasklist_name": task_list["title"],
-                            "id": task["id"],
-                            "title": task["title"],
-                            "updated": task["updated"],
-                            "due": task["due"] if "due" in task else "",
-                            "status": task["status"],
-                            "notes": task.get("notes"),
-                            "webViewLink": task.get("webViewLink", ""),
-                            "task_list_id": task_list["id"],  # Add this line
-                        }
-                        for task in response.get("items", [])
-                        if task["status"] != "completed"
-                    ]
-                    tasks.extend(non_completed_tasks)
-                    page_token = response.get("nextPageToken")
-                    if not page_token:
-                        break
-                except Exception as e:
-                    print(
-                        f"Error fetching non-completed tasks for list {task_list['title']}: {e}"
-                    )
-                    break
-            return tasks
-
-        with ThreadPoolExecutor(max_workers=1) as executor:  # Use a single thread
-            futures = [
-                executor.submit(fetch_non_completed_tasks_for_list, task_list)
+        task_lists = self.task_list_directory.fetch()
+        tasks_by_list, errors_by_list = self.task_batcher.list_tasks(
+            {
+                task_list["id"]: {
+                    "showCompleted": False,
+                    "fields": EXPORT_TASKS_PAGE_FIELDS,
+                }
                 for task_list in task_lists
-            ]
-            for future in futures:
-                try:
-                    all_tasks.extend(future.result())
-                except Exception as e:
-                    print(f"Error in future result: {e}")
+            }
+        )
+        titles = {task_list["id"]: task_list["title"] for task_list in task_lists}
+        for task_list_id, error in errors_by_list.items():
+            print(f"Error fetching tasks for list {titles[task_list_id]}: {error}")
+
+        all_tasks = [
+            Task.from_api(resource, task_list_id, titles[task_list_id])
+            for task_list_id, resources in tasks_by_list.items()
+            for resource in resources
+            if not resource.get("hidden") and resource.get("status") != "completed"
+        ]
 
         print(f"Total non-completed tasks fetched: {len(all_tasks)}")
         return all_tasks
 
-    def fetch_all_tasks(self, completed: bool = False) -> List[Dict[str, Any]]:
+    def sync_all_task_lists(
+        self, force: bool = False, on_page: Optional[Callable] = None
+    ) -> None:
+        """
+        Syncs every task list with the API, unless that was done recently.
+
+        Lists synced individually in between (e.g. after a mutation) keep
+        the cache and the date index current, so switching filters within
+        CACHE_MAX_AGE seconds does not query the API. A call made while
+        another one syncs waits for it instead of syncing again.
+
+        Args:
+            force (bool): If True, sync even if every list was synced recently
+            on_page (Optional[Callable]): Called with the tasks of each page
+                of the lists downloaded for the first time, see TaskSync
+        """
+        if not force and not self.is_sync_due():
+            return
+        self.sync_flights.run("all_task_lists", self._sync_all_task_lists, on_page)
+
+    def _sync_all_task_lists(self, report: Callable) -> None:
         """
-        Fetches all tasks from all task lists.
+        Syncs every task list with the API, see sync_all_task_lists.
 
         Args:
-            completed (bool): If True, fetches only completed tasks from the last week
+            report (Callable): Called with the tasks of each downloaded page
+        """
+        print("Syncing all task lists...")
+        # Ask for the lists now: TaskSync records the fetch time as the
+        # point unchanged lists are synced up to
+        started_at = time.time()
+        task_lists = self.task_list_directory.fetch(max_age=0)
+        self.task_sync.sync_task_lists(task_lists, started_at, on_page=report)
+        self.all_task_lists_synced_at = started_at
+
+    def is_sync_due(self) -> bool:
+        """Returns whether sync_all_task_lists would query the API."""
+        return time.time() - self.all_task_lists_synced_at >= CACHE_MAX_AGE
+
+    def show_snapshot(self) -> None:
+        """
+        Shows the profile and filter counts of the previous session at once.
 
-        Returns:
-            List[Dict[str, Any]]: A list of task dictionaries containing task details
-        """
-        print("Fetching all tasks...")
-        all_tasks = []
-        task_lists = self.tasks_service.tasklists().list().execute().get("items", [])
-
-        def fetch_tasks_for_list(task_list):
-            tasks = []
-            page_token = None
-            while True:
-                try:
-                    if completed:
-                        one_week_ago = datetime.now() - timedelta(days=7)
-                        one_week_ago_rfc3339 = one_week_ago.isoformat() + "Z"
-                        response = (
-                            self.tasks_service.tasks()
-                            .list(
-                                tasklist=task_list["id"],
-                                showHidden=True,
-                                completedMin=one_week_ago_rfc3339,
-                                pageToken=page_token,
-                            )
-                            .execute()
-                        )
-                    else:
-                        response = (
-                            self.tasks_service.tasks()
-                            .list(tasklist=task_list["id"], pageToken=page_token)
-                            .execute()
-                        )
-                    # Enrich tasks with task list information
-                    for task in response.get("items", []):
-                        task["task_list_id"] = task_list["id"]  # Add task list ID
-                        task["tasklist_name"] = task_list["title"]  # Add task list name
-                        tasks.append(task)
-                    page_token = response.get("nextPageToken")
-                    if not page_token:
-                        break
-                except Exception as e:
-                    print(f"Error fetching tasks for list {task_list['title']}: {e}")
-                    break
-            return tasks
-
-        with ThreadPoolExecutor(max_workers=1) as executor:  # Use a single thread
-            futures = [
-                executor.submit(fetch_tasks_for_list, task_list)
-                for task_list in task_lists
+        Both are replaced by their current values once start() fetched them.
+        """
+        if self.user_info:
+            self.show_user_profile(self.user_info)
+        counts = self.snapshot.get("filter_counts")
+        if counts:
+            self.show_filter_counts(counts)
+
+    def restore_view(self) -> None:
+        """
+        Shows the task list or filter the previous session ended on.
+
+        Its tasks are drawn from the local cache as they are, then
+        revalidated the same way as on a click; the fresh tasks only update
+        the rows that changed. Clicking elsewhere meanwhile supersedes both.
+        """
+        view = self.snapshot.get("view") or {}
+        task_list_id = view.get("task_list_id")
+        selected_button = self.filter_buttons.get(view.get("filter"))
+        sidebar = self.task_list_sidebar
+        if task_list_id:
+            items = [
+                sidebar.item(row)
+                for row in range(sidebar.count())
+                if sidebar.item(row).data(Qt.UserRole) == task_list_id
             ]
-            for future in futures:
-                try:
-                    all_tasks.extend(future.result())
-                except Exception as e:
-                    print(f"Error in future result: {e}")
+            if not items:
+                return
+            sidebar.blockSignals(True)
+            sidebar.setCurrentItem(items[0])
+            sidebar.blockSignals(False)
+            sidebar.current_tasklist_id = task_list_id
+
+            def show_cached(indexed_tasks):
+                sidebar.show_loaded_tasks(task_list_id, indexed_tasks)
+                sidebar.load_tasks_by_task_list(task_list_id)
+
+            self.runner.run(
+                "tasks",
+                lambda: index_tasks(self.task_cache.get_tasks(task_list_id)),
+                on_result=show_cached,
+                priority=LOCAL_PRIORITY,
+            )
+        elif selected_button is not None:
+            selected_button.blockSignals(True)
+            selected_button.setChecked(True)
+            selected_button.blockSignals(False)
+
+            def show_cached(indexed_tasks):
+                self.show_filtered_tasks(indexed_tasks, selected_button)
+                self.filter_tasks()
+
+            self.runner.run(
+                "tasks",
+                lambda: index_tasks(self.filtered_tasks(selected_button)),
+                on_result=show_cached,
+                priority=LOCAL_PRIORITY,
+            )
 
-        print(f"Total tasks fetched: {len(all_tasks)}")
-        return all_tasks
+    def save_snapshot(self) -> None:
+        """Saves what the window shows, for the next start to show it at once."""
+        sidebar = self.task_list_sidebar
+        checked_button = self.radio_button_group.checkedButton()
+        if sidebar.shown_task_list_id is not None:
+            view = {"task_list_id": sidebar.shown_task_list_id}
+        elif checked_button is not None:
+            view = {"filter": self.filter_name(checked_button)}
+        else:
+            # Search results are not worth restoring
+            view = None
+        values = {
+            "user_info": self.user_info,
+            "view": view,
+            "recent_task_lists": self.task_prefetcher.recent(),
+        }
+        if self.date_index.is_loaded:
+            values["filter_counts"] = self.date_index.counts(
+                completed_min=recently_completed_min()
+            )
+        self.session_snapshot.save(values)
+
+    def closeEvent(self, event):
+        """Saves the session snapshot before the window closes."""
+        self.save_snapshot()
+        super().closeEvent(event)
 
     def start(self):
+        # Saves the token the first requests would otherwise refresh unsaved
+        self.runner.run("credentials", self.refresh_token)
         self.load_task_lists()
+        # Draw the last view from the cache, then bring it up to date
+        self.restore_view()
+        self.runner.run("profile", self.get_user_info, self.show_user_profile)
+        # Live filter counts, replacing those of the snapshot
+        self.runner.run(
+            "date_index",
+            self.load_date_index,
+            on_result=lambda _: self.update_filter_counts(),
+        )
+        # Send the changes left over by the previous run
+        self.outbox.start()
+        # Move the date filters to the next day at midnight
+        self.day_timer = QTimer(self)
+        self.day_timer.setSingleShot(True)
+        self.day_timer.timeout.connect(self.roll_day)
+        self.schedule_day_rollover()
         # Connect selection change to update details panel
-        self.task_table.itemSelectionChanged.connect(
+        self.task_table.selectionModel().selectionChanged.connect(
             self.details_panel.update_details_panel
         )
 
     def handle_title_click(self, row, column):
         if column == 0:
-            item = self.task_table.item(row, 0)
-            if item:
-                # Get the task ID from the data stored in the item
-                task_id = item.data(Qt.UserRole)
+            index = self.task_proxy_model.index(row, 0)
+            if index.isValid():
+                task = self.task_proxy_model.task_for_index(index)
                 # Use the task ID to fetch the task details
-                task_details = (
-                    self.tasks_service.tasks()
-                    .get(
-                        tasklist=self.task_list_sidebar.current_tasklist_id,
-                        task=task_id,
-                    )
-                    .execute()
+                task_details = self.tasks_client.get_task(
+                    task.task_list_id, task.id, DETAIL_TASK_FIELDS
                 )
 
                 # Extract the webViewLink from the task details
@@ -750,14 +1101,7 @@ class TaskListWindow(QMainWindow):
 
                 # After fetching the web_view_link, store it so update_details_panel can display it
                 if web_view_link:
-                    # We'll encode the link in one of the data roles for the row.
-                    item.setData(Qt.UserRole + 4, web_view_link)
-
-    def set_waiting_cursor(self):
-        QApplication.setOverrideCursor(Qt.WaitCursor)
-
-    def reset_cursor(self):
-        QApplication.restoreOverrideCursor()
+                    task.web_view_link = web_view_link
 
     def apply_shadow(self, widget: QWidget, radius: int = 8, offset: int = 2) -> None:
         """
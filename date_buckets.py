@@ -0,0 +1,244 @@
+"""Tasks grouped by due or completion date, kept sorted for the filter buttons."""
+
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from task_record import DAY_MS
+
+# Bucket names. A task that is not hidden is in exactly one due date bucket;
+# a completed task is also in the COMPLETED bucket, even when hidden.
+OVERDUE = "overdue"
+TODAY = "today"
+UPCOMING = "upcoming"  # Due within the 7 days after today
+LATER = "later"
+NO_DUE_DATE = "no_due_date"
+COMPLETED = "completed"
+
+BUCKETS = (OVERDUE, TODAY, UPCOMING, LATER, NO_DUE_DATE, COMPLETED)
+
+
+class DateBucketIndex:
+    """
+    Tasks of the local cache, split into date buckets relative to today.
+
+    Each bucket is a list of sort keys kept in display order: overdue tasks
+    latest due date first, today's and upcoming tasks earliest due date
+    first, completed tasks most recently completed first. Ties are broken
+    by task list title and position. Reading a bucket is therefore a copy
+    of its tasks, and counting it is free.
+
+    The index is filled from the TaskCache by load(), refreshed one task
+    list at a time by reload_list() after each sync, and re-split when the
+    day changes by roll_to(). Today is given as the epoch milliseconds of
+    the UTC midnight of the local date, since due dates are stored that way.
+    All methods may be called from any thread.
+    """
+
+    def __init__(self, task_cache):
+        """
+        :param task_cache: The TaskCache the tasks are read from.
+        """
+        self.task_cache = task_cache
+        self.today_start = None
+        self._lock = threading.RLock()
+        # Task ID -> Task
+        self._tasks = {}
+        # Task ID -> list of (bucket, key) entries
+        self._entries = {}
+        # Task list ID -> set of task IDs
+        self._task_list_ids = defaultdict(set)
+        # Bucket -> sorted list of keys, the task ID being the last element
+        self._buckets = {bucket: [] for bucket in BUCKETS}
+
+    @property
+    def is_loaded(self):
+        """Whether load() was called."""
+        return self.today_start is not None
+
+    def load(self, today_start):
+        """
+        Fill the index with every task of the cache.
+
+        :param today_start: Start of the current day, see the class docstring.
+        """
+        with self._lock:
+            tasks = self.task_cache.get_all_tasks(include_hidden=True)
+            self._rebuild(tasks, today_start)
+
+    def roll_to(self, today_start):
+        """
+        Re-split the tasks into buckets for a new day.
+
+        :param today_start: Start of the new day.
+        :return: True if the day changed.
+        """
+        with self._lock:
+            if today_start == self.today_start:
+                return False
+            self._rebuild(list(self._tasks.values()), today_start)
+            return True
+
+    def reload_list(self, task_list_id):
+        """
+        Replace the tasks of a list with their current cached version.
+
+        Does nothing until the index is loaded.
+
+        :param task_list_id: ID of the task list.
+        """
+        with self._lock:
+            if not self.is_loaded:
+                return
+            tasks = self.task_cache.get_tasks(task_list_id, include_hidden=True)
+            for task_id in list(self._task_list_ids.get(task_list_id, ())):
+                self._remove(task_id)
+            for task in tasks:
+                self._add(task)
+
+    def retain_lists(self, task_list_ids):
+        """
+        Forget the tasks of the lists that no longer exist.
+
+        :param task_list_ids: IDs of the existing task lists.
+        """
+        with self._lock:
+            for task_list_id in set(self._task_list_ids) - set(task_list_ids):
+                for task_id in list(self._task_list_ids[task_list_id]):
+                    self._remove(task_id)
+                del self._task_list_ids[task_list_id]
+
+    def add(self, task):
+        """
+        Add a task, or move it to its new buckets if it is already indexed.
+
+        Does nothing until the index is loaded.
+
+        :param task: A Task record.
+        """
+        with self._lock:
+            if not self.is_loaded:
+                return
+            self._remove(task.id)
+            self._add(task)
+
+    def remove(self, task_id):
+        """
+        Drop a task from the index.
+
+        :param task_id: ID of the task; unknown IDs are ignored.
+        """
+        with self._lock:
+            self._remove(task_id)
+
+    def tasks_in(self, *buckets):
+        """
+        Return the tasks of one or more buckets, in display order.
+
+        :param buckets: Bucket names, read one after the other.
+        :return: List of Task records.
+        """
+        with self._lock:
+            return [
+                self._tasks[key[-1]]
+                for bucket in buckets
+                for key in self._buckets[bucket]
+            ]
+
+    def visible_tasks(self):
+        """
+        Return every task but the hidden ones, by task list title and position.
+
+        :return: List of Task records.
+        """
+        with self._lock:
+            tasks = [task for task in self._tasks.values() if not task.hidden]
+        return sorted(
+            tasks,
+            key=lambda task: ((task.tasklist_name or "").lower(), task.position or ""),
+        )
+
+    def completed_since(self, completed_min):
+        """
+        Return the tasks completed at or after a time, most recent first.
+
+        :param completed_min: Lower bound in epoch milliseconds.
+        :return: List of Task records, hidden tasks included.
+        """
+        with self._lock:
+            keys = self._buckets[COMPLETED]
+            end = bisect_left(keys, (-completed_min + 1,))
+            return [self._tasks[key[-1]] for key in keys[:end]]
+
+    def counts(self, completed_min=None):
+        """
+        Return the number of tasks of every bucket.
+
+        :param completed_min: If given, COMPLETED only counts the tasks
+            completed at or after this time.
+        :return: Dictionary of bucket name to count.
+        """
+        with self._lock:
+            counts = {bucket: len(keys) for bucket, keys in self._buckets.items()}
+            if completed_min is not None:
+                counts[COMPLETED] = bisect_left(
+                    self._buckets[COMPLETED], (-completed_min + 1,)
+                )
+            return counts
+
+    def _rebuild(self, tasks, today_start):
+        """Re-split every task for the given day."""
+        self.today_start = today_start
+        self._tasks.clear()
+        self._entries.clear()
+        self._task_list_ids.clear()
+        unsorted = {bucket: [] for bucket in BUCKETS}
+        for task in tasks:
+            entries = self._bucket_entries(task)
+            self._register(task, entries)
+            for bucket, key in entries:
+                unsorted[bucket].append(key)
+        self._buckets = {bucket: sorted(keys) for bucket, keys in unsorted.items()}
+
+    def _add(self, task):
+        """Insert a task that is not indexed yet."""
+        entries = self._bucket_entries(task)
+        self._register(task, entries)
+        for bucket, key in entries:
+            insort(self._buckets[bucket], key)
+
+    def _register(self, task, entries):
+        """Record a task and its bucket entries."""
+        self._tasks[task.id] = task
+        self._entries[task.id] = entries
+        self._task_list_ids[task.task_list_id].add(task.id)
+
+    def _remove(self, task_id):
+        """Unindex a task, if it is indexed."""
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return
+        for bucket, key in self._entries.pop(task_id):
+            keys = self._buckets[bucket]
+            del keys[bisect_left(keys, key)]
+        self._task_list_ids[task.task_list_id].discard(task_id)
+
+    def _bucket_entries(self, task):
+        """Return the (bucket, key) entries of a task for the current day."""
+        tie_break = ((task.tasklist_name or "").lower(), task.position or "", task.id)
+        entries = []
+        if not task.hidden:
+            due = task.due
+            if due is None:
+                entries.append((NO_DUE_DATE, tie_break))
+            elif due < self.today_start:
+                entries.append((OVERDUE, (-due, *tie_break)))
+            elif due < self.today_start + DAY_MS:
+                entries.append((TODAY, (due, *tie_break)))
+            elif due < self.today_start + 8 * DAY_MS:
+                entries.append((UPCOMING, (due, *tie_break)))
+            else:
+                entries.append((LATER, (due, *tie_break)))
+        if task.is_completed and task.completed is not None:
+            entries.append((COMPLETED, (-task.completed, *tie_break)))
+        return entries
@@ -1,47 +1,185 @@
 import sqlite3
 
+# Location of the local task database
+DB_PATH = "tasks.db"
+
+# Bumped whenever the schema changes. The tables only hold cached data, so
+# a database with another version is simply rebuilt.
+SCHEMA_VERSION = 2
+
 # Define the schema for the task lists table
 task_lists_table = """
-CREATE TABLE task_lists (
+CREATE TABLE IF NOT EXISTS task_lists (
     kind TEXT,
     id TEXT PRIMARY KEY,
     etag TEXT,
     title TEXT NOT NULL,
     updated DATETIME,
-    selfLink TEXT
+    selfLink TEXT,
+    synced_at REAL,
+    synced_etag TEXT,
+    synced_updated DATETIME
 );
 """
 
 # Define the schema for the tasks table
+# due, completed and updated are stored as milliseconds since the epoch
 tasks_table = """
-CREATE TABLE tasks (
+CREATE TABLE IF NOT EXISTS tasks (
     id TEXT PRIMARY KEY,
     etag TEXT,
     title TEXT NOT NULL,
-    updated DATETIME,
+    updated INTEGER,
     selfLink TEXT,
     parent TEXT,
-    position INTEGER,
+    position TEXT,
     notes TEXT,
     status TEXT,
-    due DATETIME,
-    completed DATETIME,
+    due INTEGER,
+    completed INTEGER,
     deleted INTEGER,
     hidden INTEGER,
-    webViewLink TEXT
-    task_list_id TEXT REFERENCES task_lists(id),
-    FOREIGN KEY (task_list_id) REFERENCES task_lists(id)
+    webViewLink TEXT,
+    task_list_id TEXT REFERENCES task_lists(id)
+);
+"""
+
+# Indexes used by the sidebar, the filters and the exports
+tasks_indexes = [
+    "CREATE INDEX IF NOT EXISTS idx_tasks_task_list_id ON tasks(task_list_id);",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks(due);",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed);",
+]
+
+# Full-text index over the title and notes of the tasks table. It stores no
+# copy of the text (external content) and is kept in step by the triggers.
+tasks_fts_table = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    title,
+    notes,
+    content='tasks',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
 );
 """
 
-# Create a connection to the database
-conn = sqlite3.connect("tasks.db")
+tasks_fts_triggers = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts (rowid, title, notes)
+        VALUES (new.rowid, new.title, new.notes);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, notes)
+        VALUES ('delete', old.rowid, old.title, old.notes);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, notes ON tasks
+    BEGIN
+        INSERT INTO tasks_fts (tasks_fts, rowid, title, notes)
+        VALUES ('delete', old.rowid, old.title, old.notes);
+        INSERT INTO tasks_fts (rowid, title, notes)
+        VALUES (new.rowid, new.title, new.notes);
+    END;
+    """,
+]
+
+# Cached YouTube video details, as JSON, or NULL for videos that do not
+# exist. Unrelated to the task data, so kept across schema versions.
+youtube_videos_table = """
+CREATE TABLE IF NOT EXISTS youtube_videos (
+    video_id TEXT PRIMARY KEY,
+    info TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+"""
+
+youtube_videos_index = (
+    "CREATE INDEX IF NOT EXISTS idx_youtube_videos_accessed_at "
+    "ON youtube_videos(accessed_at);"
+)
+
+# Downloaded images by URL, see image_cache.ImageCache. Also kept across
+# schema versions.
+image_cache_table = """
+CREATE TABLE IF NOT EXISTS image_cache (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+# Task mutations waiting to be sent to the API, see mutation_outbox. They are
+# the user's own changes, so they are kept across schema versions too.
+outbox_table = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    action TEXT NOT NULL,
+    task_list_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    destination_task_list_id TEXT,
+    body TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+outbox_index = "CREATE INDEX IF NOT EXISTS idx_outbox_task_id ON outbox(task_id);"
+
+# What the window showed when it was last closed, as JSON by name, see
+# session_snapshot. Kept across schema versions like the outbox.
+session_snapshot_table = """
+CREATE TABLE IF NOT EXISTS session_snapshot (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def init_db(conn):
+    """
+    Create the task tables, indexes and full-text index if they do not exist yet.
+
+    Tables created with another SCHEMA_VERSION, including those of the
+    original version of this script, are dropped and rebuilt.
+
+    :param conn: An open sqlite3 connection.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    with conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS tasks_fts")
+            conn.execute("DROP TABLE IF EXISTS tasks")
+            conn.execute("DROP TABLE IF EXISTS task_lists")
+        conn.execute(task_lists_table)
+        conn.execute(tasks_table)
+        for index in tasks_indexes:
+            conn.execute(index)
+        conn.execute(tasks_fts_table)
+        for trigger in tasks_fts_triggers:
+            conn.execute(trigger)
+        conn.execute(youtube_videos_table)
+        conn.execute(youtube_videos_index)
+        conn.execute(image_cache_table)
+        conn.execute(outbox_table)
+        conn.execute(outbox_index)
+        conn.execute(session_snapshot_table)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
-# Create the tables
-with conn:
-    cursor = conn.cursor()
-    cursor.execute(task_lists_table)
-    cursor.execute(tasks_table)
 
-# Close the connection
-conn.close()
+if __name__ == "__main__":
+    # Create a connection to the database
+    conn = sqlite3.connect(DB_PATH)
+    # Create the tables
+    init_db(conn)
+    # Close the connection
+    conn.close()
@@ -2,8 +2,8 @@ import csv
 import datetime
 
 from PySide6.QtWidgets import QMessageBox, QApplication
-from PySide6.QtCore import Qt
-from openpyxl import Workbook
+
+from task_record import format_timestamp
 
 HEADER = [
     "Number",
@@ -18,8 +18,28 @@ HEADER = [
 ]
 
 
+# The export_* functions do blocking file and network work and may run off
+# the GUI thread, so they must not show any dialog themselves.
+
+
+def task_row(task):
+    """Return the exported values of a Task, in the order of HEADER minus Number."""
+    return [
+        task.tasklist_name,
+        task.id,
+        task.title,
+        format_timestamp(task.updated),
+        format_timestamp(task.due),
+        task.status,
+        task.notes,
+        task.web_view_link or "",
+    ]
+
+
 def export_tasks_to_excel(tasks, filename="tasks.xlsx"):
-    QApplication.setOverrideCursor(Qt.WaitCursor)
+    # openpyxl takes a while to import, so it is loaded on the first export
+    from openpyxl import Workbook
+
     wb = Workbook()
     ws = wb.active
     # Add a header row
@@ -27,28 +47,14 @@ def export_tasks_to_excel(tasks, filename="tasks.xlsx"):
     # Append task data
     sequence_number = 1
     for task in tasks:
-        ws.append(
-            [
-                sequence_number,
-                task["tasklist_name"],
-                task["id"],
-                task["title"],
-                task["updated"],
-                task["due"],
-                task["status"],
-                task["notes"],
-                task["webViewLink"],
-            ]
-        )
+        ws.append([sequence_number, *task_row(task)])
         sequence_number += 1
     wb.save(filename)
-    QApplication.restoreOverrideCursor()
     print(f"Tasks exported to {filename}")
-    show_file_location_dialog(filename)
+    return filename
 
 
 def export_tasks_to_csv(tasks, filename="tasks.csv"):
-    QApplication.setOverrideCursor(Qt.WaitCursor)
     with open(filename, mode="w", newline="", encoding="utf-8") as file:
         fieldnames = [
             "number",
@@ -61,7 +67,7 @@ def export_tasks_to_csv(tasks, filename="tasks.csv"):
             "notes",
             "webViewLink",
         ]
-        writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction="ignore")
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
 
         # Write the header
         writer.writeheader()
@@ -69,15 +75,15 @@ def export_tasks_to_csv(tasks, filename="tasks.csv"):
         # Write the task data
         sequence_number = 1
         for task in tasks:
-            writer.writerow({**{"number": sequence_number}, **task})
+            writer.writerow(
+                dict(zip(fieldnames, [sequence_number, *task_row(task)]))
+            )
             sequence_number += 1
-    QApplication.restoreOverrideCursor()
     print(f"Tasks exported to {filename}")
-    show_file_location_dialog(filename)
+    return filename
 
 
-def export_tasks_to_gsheet(tasks, service):
-    QApplication.setOverrideCursor(Qt.WaitCursor)
+def export_tasks_to_gsheet(tasks, service, http=None):
     # Create a new Google Spreadsheet with a name based on the current timestamp
     spreadsheet = {
         "properties": {
@@ -87,26 +93,14 @@ def export_tasks_to_gsheet(tasks, service):
     spreadsheet = (
         service.spreadsheets()
         .create(body=spreadsheet, fields="spreadsheetId")
-        .execute()
+        .execute(http=http)
     )
 
     # Prepare the data to be written to the new spreadsheet
     data = [HEADER]
     sequence_number = 1
     for task in tasks:
-        data.append(
-            [
-                sequence_number,
-                task["tasklist_name"],
-                task["id"],
-                task["title"],
-                task["updated"],
-                task["due"],
-                task["status"],
-                task["notes"],
-                task["webViewLink"],
-            ]
-        )
+        data.append([sequence_number, *task_row(task)])
         sequence_number += 1
 
     # Write the data to the new spreadsheet
@@ -120,9 +114,9 @@ def export_tasks_to_gsheet(tasks, service):
             valueInputOption="RAW",
             body=body,
         )
-        .execute()
+        .execute(http=http)
     )
-    QApplication.restoreOverrideCursor()
+    return spreadsheet["spreadsheetId"]
 
 
 def show_file_location_dialog(file_path):
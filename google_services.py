@@ -0,0 +1,90 @@
+"""Google credentials and API services, made without delaying startup."""
+
+import os
+import threading
+
+from google.oauth2.credentials import Credentials
+
+TOKEN_PATH = "credentials/token.json"
+CLIENT_SECRETS_PATH = "credentials/credentials.json"
+
+
+def load_credentials(scopes):
+    """
+    Load the saved OAuth credentials, asking the user to sign in if needed.
+
+    An expired access token is not refreshed here: the first API request
+    refreshes it from a worker thread, see HttpPool.ensure_valid_credentials.
+    Only a missing or unusable token blocks, on the browser sign-in.
+
+    :param scopes: The OAuth scopes the application needs.
+    :return: The Credentials.
+    """
+    creds = None
+    if os.path.exists(TOKEN_PATH):
+        creds = Credentials.from_authorized_user_file(TOKEN_PATH, scopes)
+    if creds and (creds.valid or (creds.expired and creds.refresh_token)):
+        return creds
+
+    print("Getting new token")
+    # Imported here since it is only needed on the first run
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRETS_PATH, scopes)
+    creds = flow.run_local_server(port=0)
+    save_credentials(creds)
+    return creds
+
+
+def save_credentials(creds):
+    """
+    Save credentials for the next run, e.g. after refreshing the token.
+
+    :param creds: The Credentials.
+    """
+    with open(TOKEN_PATH, "w") as token:
+        token.write(creds.to_json())
+
+
+class LazyService:
+    """
+    A googleapiclient service built on first use.
+
+    Stands in for the service returned by ``build()``: the first attribute
+    access, e.g. ``service.tasks()``, builds it, from whichever thread makes
+    it, and later ones go straight to it. Building uses the discovery
+    documents shipped with googleapiclient, so it never waits on the
+    network, and neither googleapiclient.discovery nor the document is
+    loaded until a service is actually needed.
+    """
+
+    def __init__(self, name, version, **kwargs):
+        """
+        :param name: The API name, e.g. "tasks".
+        :param version: The API version, e.g. "v1".
+        :param kwargs: Other arguments of ``build()``, e.g. ``credentials``
+            or ``developerKey``.
+        """
+        self._name = name
+        self._version = version
+        self._kwargs = kwargs
+        self._service = None
+        self._lock = threading.Lock()
+
+    def service(self):
+        """Return the underlying service, building it if needed."""
+        if self._service is None:
+            with self._lock:
+                if self._service is None:
+                    from googleapiclient.discovery import build
+
+                    self._service = build(
+                        self._name,
+                        self._version,
+                        static_discovery=True,
+                        **self._kwargs,
+                    )
+        return self._service
+
+    def __getattr__(self, name):
+        return getattr(self.service(), name)
@@ -0,0 +1,95 @@
+"""Per-thread authorized HTTP transports and a parallel fetcher for Google APIs."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+
+# Default number of API requests run at the same time
+FETCH_CONCURRENCY = 8
+
+
+class HttpPool:
+    """
+    Hands out one authorized httplib2 transport per thread.
+
+    httplib2 connections are not thread-safe, so a googleapiclient request
+    executed from a worker thread must be given its own transport through
+    ``request.execute(http=pool.http())`` instead of the one the service
+    was built with.
+    """
+
+    def __init__(self, creds):
+        """
+        :param creds: The OAuth credentials shared by every transport.
+        """
+        self.creds = creds
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+
+    def http(self):
+        """
+        Return the transport of the calling thread, creating it if needed.
+
+        :return: An AuthorizedHttp bound to the shared credentials.
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = AuthorizedHttp(self.creds, http=httplib2.Http())
+            self._local.http = http
+        return http
+
+    def ensure_valid_credentials(self):
+        """
+        Refresh the shared credentials once, before threads race to do it.
+        """
+        with self._refresh_lock:
+            if not self.creds.valid:
+                # requests is slow to import and only needed to refresh
+                from google.auth.transport.requests import Request
+
+                self.creds.refresh(Request())
+
+
+class ParallelFetcher:
+    """Runs blocking API calls concurrently on a long-lived thread pool."""
+
+    def __init__(self, http_pool, max_workers=FETCH_CONCURRENCY):
+        """
+        :param http_pool: The HttpPool providing per-thread transports.
+        :param max_workers: How many calls may run at the same time.
+        """
+        self.http_pool = http_pool
+        self.max_workers = max_workers
+        # Kept alive between calls so the per-thread connections are reused
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="api-fetch"
+        )
+
+    def map(self, fn, items):
+        """
+        Call ``fn`` on every item concurrently.
+
+        :param fn: Callable taking one item; it should execute its requests
+            with ``http=self.http_pool.http()``.
+        :param items: The items to process.
+        :return: List of ``(item, result, error)`` tuples in input order,
+            where exactly one of ``result`` and ``error`` is meaningful.
+        """
+        items = list(items)
+        if not items:
+            return []
+        self.http_pool.ensure_valid_credentials()
+        futures = [self._executor.submit(fn, item) for item in items]
+        results = []
+        for item, future in zip(items, futures):
+            try:
+                results.append((item, future.result(), None))
+            except Exception as e:
+                results.append((item, None, e))
+        return results
+
+    def shutdown(self):
+        """Stop the worker threads once pending calls are done."""
+        self._executor.shutdown(wait=False)
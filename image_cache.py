@@ -0,0 +1,256 @@
+"""Two-level cache of downloaded images, stored ready to display."""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from PySide6.QtCore import QRect, Qt
+from PySide6.QtGui import QBrush, QImage, QPainter, QPixmap, QPixmapCache
+
+from db_init import DB_PATH, init_db
+from workers import MAX_THREADS
+
+# Directory holding the downloaded images and their processed variants
+IMAGE_CACHE_DIR = "image_cache"
+
+# Seconds after which a cached image is revalidated with the server
+IMAGE_MAX_AGE = 24 * 3600
+
+# Seconds to wait for an image server
+DOWNLOAD_TIMEOUT = 10
+
+
+def scaled_image(width, height):
+    """
+    Return a processor scaling an image to fit in a box, keeping its ratio.
+
+    :param width: Width of the box in pixels.
+    :param height: Height of the box in pixels.
+    """
+
+    def process(image):
+        return image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    return process
+
+
+def circular_image(size):
+    """
+    Return a processor scaling an image to a square and cropping it to a circle.
+
+    :param size: Diameter of the circle in pixels.
+    """
+
+    def process(image):
+        scaled = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        circle = QImage(scaled.size(), QImage.Format_ARGB32_Premultiplied)
+        circle.fill(Qt.transparent)
+        painter = QPainter(circle)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setBrush(QBrush(scaled))
+        painter.setPen(Qt.NoPen)
+        painter.drawEllipse(QRect(0, 0, scaled.width(), scaled.height()))
+        painter.end()
+        return circle
+
+    return process
+
+
+class ImageCache:
+    """
+    Images downloaded over HTTP, cached in memory and on disk.
+
+    Each image is used in a *variant*: a name for a processing step (such as
+    scaling and masking) and its processed result. Displayed variants are
+    kept as QPixmaps in the QPixmapCache. On disk, the downloaded bytes are
+    stored under their SHA-256, the processed variants as PNGs beside them,
+    and the URL to hash mapping with the ETag and Last-Modified headers in
+    the local database. Entries older than IMAGE_MAX_AGE are revalidated
+    with a conditional GET, so unchanged images are never downloaded twice.
+
+    request_pixmap() is the entry point for the GUI thread; disk and network
+    work is done by load_image() on a TaskRunner thread.
+    """
+
+    def __init__(self, directory=IMAGE_CACHE_DIR, path=DB_PATH, max_age=IMAGE_MAX_AGE):
+        """
+        :param directory: Directory of the cached files.
+        :param path: Path of the SQLite database file.
+        :param max_age: Seconds after which an entry is revalidated.
+        """
+        self.directory = directory
+        self.max_age = max_age
+        # Shared by the loading threads, so image hosts are connected to once
+        self._session = requests.Session()
+        self._session.mount(
+            "https://", requests.adapters.HTTPAdapter(pool_maxsize=MAX_THREADS)
+        )
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        init_db(self._conn)
+
+    def close(self):
+        """Close the underlying database connection and HTTP connections."""
+        with self._lock:
+            self._conn.close()
+        self._session.close()
+
+    def request_pixmap(self, runner, channel, url, variant, process, on_pixmap):
+        """
+        Deliver the pixmap of an image variant, loading it if needed.
+
+        A variant already in memory is delivered immediately, otherwise it
+        is loaded on the runner's pool and delivered when ready. Call from
+        the GUI thread.
+
+        :param runner: The TaskRunner to load the image with.
+        :param channel: Runner channel of the load.
+        :param url: URL of the image.
+        :param variant: Name of the processing, e.g. "avatar-46".
+        :param process: Function turning the downloaded QImage into the variant.
+        :param on_pixmap: Called with the QPixmap on the GUI thread.
+        """
+        pixmap = QPixmapCache.find(_pixmap_key(url, variant))
+        if pixmap is not None:
+            runner.cancel(channel)
+            on_pixmap(pixmap)
+            return
+        runner.run(
+            channel,
+            lambda: self.load_image(url, variant, process),
+            on_result=lambda image: on_pixmap(self._cache_pixmap(url, variant, image)),
+        )
+
+    def load_image(self, url, variant, process):
+        """
+        Return an image variant from the disk cache, downloading if needed.
+
+        Runs off the GUI thread.
+
+        :param url: URL of the image.
+        :param variant: Name of the processing.
+        :param process: Function turning the downloaded QImage into the variant.
+        :return: The processed QImage.
+        """
+        entry = self._get_entry(url)
+        if entry is None:
+            entry = self._download(url)
+        elif time.time() - entry["fetched_at"] > self.max_age:
+            entry = self._revalidate(url, entry)
+
+        content_hash = entry["content_hash"]
+        variant_path = self._path(content_hash, variant)
+        if os.path.exists(variant_path):
+            return QImage(variant_path)
+
+        data = self._read(self._path(content_hash))
+        if data is None:
+            # The file was removed behind our back, download it again
+            entry = self._download(url)
+            data = self._read(self._path(entry["content_hash"]))
+        image = process(QImage.fromData(data))
+        if not image.isNull():
+            image.save(variant_path, "PNG")
+        return image
+
+    def _cache_pixmap(self, url, variant, image):
+        """Convert a loaded image into a pixmap kept in memory. GUI thread only."""
+        pixmap = QPixmap.fromImage(image)
+        QPixmapCache.insert(_pixmap_key(url, variant), pixmap)
+        return pixmap
+
+    def _revalidate(self, url, entry):
+        """
+        Ask the server whether a stale entry changed, downloading it if so.
+
+        The stale entry is kept if the server cannot be reached.
+        """
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = self._session.get(
+                url, headers=headers, timeout=DOWNLOAD_TIMEOUT
+            )
+            if response.status_code == 304:
+                with self._lock, self._conn:
+                    self._conn.execute(
+                        "UPDATE image_cache SET fetched_at = ? WHERE url = ?",
+                        (time.time(), url),
+                    )
+                return entry
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error revalidating image {url}: {e}")
+            return entry
+        return self._store(url, response)
+
+    def _download(self, url):
+        """Download an image unconditionally and store it."""
+        response = self._session.get(url, timeout=DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        return self._store(url, response)
+
+    def _store(self, url, response):
+        """Write downloaded bytes under their hash and record the entry."""
+        data = response.content
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._path(content_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temporary_path, "wb") as file:
+                file.write(data)
+            os.replace(temporary_path, path)
+        entry = {
+            "url": url,
+            "content_hash": content_hash,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO image_cache
+                    (url, content_hash, etag, last_modified, fetched_at)
+                VALUES (:url, :content_hash, :etag, :last_modified, :fetched_at)
+                """,
+                entry,
+            )
+        return entry
+
+    def _get_entry(self, url):
+        """Return the recorded entry of a URL, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, content_hash, etag, last_modified, fetched_at "
+                "FROM image_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return None if row is None else dict(row)
+
+    def _path(self, content_hash, variant=None):
+        """Return the path of downloaded bytes, or of one of their variants."""
+        name = content_hash if variant is None else f"{content_hash}-{variant}.png"
+        return os.path.join(self.directory, content_hash[:2], name)
+
+    @staticmethod
+    def _read(path):
+        """Return the contents of a file, or None if it does not exist."""
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+
+def _pixmap_key(url, variant):
+    """Return the QPixmapCache key of an image variant."""
+    return f"{variant}:{url}"
@@ -5,6 +5,7 @@ Launches the main TaskListWindow.
 
 import sys
 
+from PySide6.QtCore import QTimer
 from PySide6.QtGui import QFont, QColor
 from PySide6.QtWidgets import QApplication
 
@@ -14,6 +15,7 @@ from TaskListWindow import TaskListWindow
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = TaskListWindow(app)
-    window.start()
     window.show()
+    # Paint the window before the first requests and cache reads start
+    QTimer.singleShot(0, window.start)
     sys.exit(app.exec())
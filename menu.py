@@ -2,7 +2,12 @@
 
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import QWidget, QLabel, QVBoxLayout
-from exports import export_tasks_to_csv, export_tasks_to_excel, export_tasks_to_gsheet
+from exports import (
+    export_tasks_to_csv,
+    export_tasks_to_excel,
+    export_tasks_to_gsheet,
+    show_file_location_dialog,
+)
 
 
 class TaskListMenu:
@@ -40,8 +45,9 @@ class TaskListMenu:
         # CSV export action
         export_csv_action = QAction("Export to CSV", self.window)
         export_csv_action.triggered.connect(
-            lambda: self.export_tasks_to_csv(
-                tasks=self.window.fetch_non_completed_tasks()
+            lambda: self.run_export(
+                lambda tasks: export_tasks_to_csv(tasks=tasks),
+                on_done=show_file_location_dialog,
             )
         )
         export_menu.addAction(export_csv_action)
@@ -49,8 +55,9 @@ class TaskListMenu:
         # Excel export action
         export_excel_action = QAction("Export to Excel", self.window)
         export_excel_action.triggered.connect(
-            lambda: self.export_tasks_to_excel(
-                tasks=self.window.fetch_non_completed_tasks()
+            lambda: self.run_export(
+                lambda tasks: export_tasks_to_excel(tasks=tasks),
+                on_done=show_file_location_dialog,
             )
         )
         export_menu.addAction(export_excel_action)
@@ -58,24 +65,31 @@ class TaskListMenu:
         # Google Sheets export action
         export_gsheet_action = QAction("Export to Google Sheets", self.window)
         export_gsheet_action.triggered.connect(
-            lambda: self.export_tasks_to_gsheet(
-                tasks=self.window.fetch_non_completed_tasks(),
-                service=self.window.sheets_service,
+            lambda: self.run_export(
+                lambda tasks: export_tasks_to_gsheet(
+                    tasks=tasks,
+                    service=self.window.sheets_service,
+                    http=self.window.http_pool.http(),
+                )
             )
         )
         export_menu.addAction(export_gsheet_action)
 
-    def export_tasks_to_csv(self, tasks):
-        """Export tasks to CSV format."""
-        export_tasks_to_csv(tasks=tasks)
-
-    def export_tasks_to_excel(self, tasks):
-        """Export tasks to Excel format."""
-        export_tasks_to_excel(tasks=tasks)
+    def run_export(self, export, on_done=None):
+        """
+        Fetch the non-completed tasks and export them in the background.
 
-    def export_tasks_to_gsheet(self, tasks, service):
-        """Export tasks to Google Sheets."""
-        export_tasks_to_gsheet(tasks=tasks, service=service)
+        Args:
+            export: Callable taking the tasks and writing them somewhere
+            on_done: Optional callable run on the GUI thread with the
+                export's return value
+        """
+        self.window.runner.run(
+            "export",
+            lambda: export(self.window.fetch_non_completed_tasks()),
+            on_result=on_done,
+            on_error=lambda e: print(f"Error exporting tasks: {e}"),
+        )
 
     def show_about_popup(self):
         """Show the About dialog."""
@@ -0,0 +1,341 @@
+"""Persistent queue of task mutations, sent to the API in the background."""
+
+import json
+import random
+import sqlite3
+import threading
+import time
+
+from google.auth.exceptions import TransportError
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from db_init import DB_PATH, init_db
+from task_batch import BATCH_SIZE, TaskOperation
+from tasks_client import ApiError
+
+# Delay in seconds before the first retry of a failed mutation; it doubles
+# with every further attempt, up to RETRY_MAX_DELAY
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 300
+
+# Most operations sent per round; the batcher splits them into concurrent
+# batch requests of BATCH_SIZE
+DRAIN_SIZE = 4 * BATCH_SIZE
+
+# HTTP statuses of failures worth retrying
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+class MutationOutbox(QObject):
+    """
+    Task mutations waiting to be sent, stored in the local database.
+
+    enqueue() records a TaskOperation and returns at once; the outbox then
+    sends the pending operations in batches from a TaskRunner thread. The
+    operations of a task are sent one at a time and in order, those of
+    different tasks together, up to DRAIN_SIZE per round.
+
+    Redundant operations are coalesced while they wait: successive edits
+    of a task are merged into one PATCH, "complete" is an edit of the
+    status, a second move only changes the destination of the first, and a
+    delete replaces everything still queued for the task. The callbacks of
+    an operation replaced by a delete are called as if it succeeded.
+
+    An operation failing for a transient reason (no network, rate limit,
+    server error) is retried with exponential backoff; any success resets
+    the backoff of the others, since the connection is evidently back. An
+    operation the API rejects is dropped and reported. Operations still
+    queued when the application exits are sent after the next start().
+
+    ``operations_done`` and ``operations_failed`` are emitted on the GUI
+    thread after every round, for every operation including those replayed
+    from a previous run; enqueue() also takes callbacks for the operation
+    it records.
+    """
+
+    # List of (entry ID, TaskOperation, API response)
+    operations_done = Signal(list)
+    # List of (entry ID, TaskOperation, error the API answered with)
+    operations_failed = Signal(list)
+    # Number of operations waiting to be sent
+    pending_changed = Signal(int)
+
+    def __init__(self, runner, batcher, path=DB_PATH, parent=None):
+        """
+        :param runner: The TaskRunner the batches are sent from.
+        :param batcher: The TaskBatcher sending the operations.
+        :param path: Path of the SQLite database file.
+        :param parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self.runner = runner
+        self.batcher = batcher
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        init_db(self._conn)
+        # Entry ID -> list of (on_done, on_error) callbacks
+        self._callbacks = {}
+        # Entry IDs of the batch being sent
+        self._in_flight = set()
+        self._drain_timer = QTimer(self)
+        self._drain_timer.setSingleShot(True)
+        self._drain_timer.timeout.connect(self._drain)
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def start(self):
+        """Begin sending the operations, including those left by a previous run."""
+        self.pending_changed.emit(self.pending_count())
+        self._drain_timer.start(0)
+
+    def enqueue(self, operation, on_done=None, on_error=None):
+        """
+        Record an operation to send, coalescing it with the queued ones.
+
+        :param operation: The TaskOperation.
+        :param on_done: Optional callback with the API response, on success.
+        :param on_error: Optional callback with the error, if the API
+            rejected the operation. Transient failures are retried instead.
+        :return: ID of the outbox entry now carrying the operation.
+        """
+        if operation.action == "complete":
+            operation = operation._replace(action="edit", body={"status": "completed"})
+        superseded = []
+        with self._lock, self._conn:
+            waiting = self._waiting_entries(operation.task_id)
+            last = waiting[-1] if waiting else None
+            if (
+                operation.action == "edit"
+                and last is not None
+                and last["action"] == "edit"
+            ):
+                body = {**json.loads(last["body"]), **operation.body}
+                self._conn.execute(
+                    "UPDATE outbox SET body = ? WHERE id = ?",
+                    (json.dumps(body), last["id"]),
+                )
+                entry_id = last["id"]
+            elif (
+                operation.action == "move"
+                and last is not None
+                and last["action"] == "move"
+            ):
+                self._conn.execute(
+                    "UPDATE outbox SET destination_task_list_id = ? WHERE id = ?",
+                    (operation.destination_task_list_id, last["id"]),
+                )
+                entry_id = last["id"]
+            else:
+                if operation.action == "delete" and waiting:
+                    # Nothing queued matters once the task is gone; delete
+                    # it from the list it is in on the server
+                    operation = operation._replace(
+                        task_list_id=waiting[0]["task_list_id"]
+                    )
+                    for entry in waiting:
+                        self._conn.execute(
+                            "DELETE FROM outbox WHERE id = ?", (entry["id"],)
+                        )
+                        superseded.extend(self._callbacks.pop(entry["id"], []))
+                entry_id = self._insert(operation)
+        self._callbacks.setdefault(entry_id, []).append((on_done, on_error))
+        for superseded_on_done, _ in superseded:
+            if superseded_on_done is not None:
+                superseded_on_done(None)
+        self.pending_changed.emit(self.pending_count())
+        if not self._in_flight:
+            self._drain_timer.start(0)
+        return entry_id
+
+    def pending_count(self):
+        """Return the number of operations waiting to be sent."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def has_pending(self, task_id):
+        """
+        Tell whether operations on a task are waiting to be sent.
+
+        :param task_id: ID of the task.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM outbox WHERE task_id = ? LIMIT 1", (task_id,)
+            ).fetchone()
+        return row is not None
+
+    def _insert(self, operation):
+        """Store a new entry due at once, returning its ID."""
+        now = time.time()
+        cursor = self._conn.execute(
+            """
+            INSERT INTO outbox (action, task_list_id, task_id,
+                                destination_task_list_id, body,
+                                next_attempt_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                operation.action,
+                operation.task_list_id,
+                operation.task_id,
+                operation.destination_task_list_id,
+                None if operation.body is None else json.dumps(operation.body),
+                now,
+                now,
+            ),
+        )
+        return cursor.lastrowid
+
+    def _waiting_entries(self, task_id):
+        """Return the entries of a task that may still change, oldest first."""
+        rows = self._conn.execute(
+            "SELECT * FROM outbox WHERE task_id = ? ORDER BY id", (task_id,)
+        ).fetchall()
+        # Entries up to the last one being sent are out of reach
+        for index in range(len(rows) - 1, -1, -1):
+            if rows[index]["id"] in self._in_flight:
+                return rows[index + 1 :]
+        return rows
+
+    def _drain(self):
+        """Send the due operations, or wait until the next one is due."""
+        if self._in_flight:
+            return
+        with self._lock:
+            # The oldest entry of every task, so each task's are sent in order
+            rows = self._conn.execute("""
+                SELECT * FROM outbox WHERE id IN (
+                    SELECT MIN(id) FROM outbox GROUP BY task_id
+                )
+                ORDER BY next_attempt_at, id
+                """).fetchall()
+        if not rows:
+            return
+        now = time.time()
+        due = [row for row in rows if row["next_attempt_at"] <= now][:DRAIN_SIZE]
+        if not due:
+            self._drain_timer.start(int((rows[0]["next_attempt_at"] - now) * 1000) + 1)
+            return
+
+        entries = [(row["id"], _row_to_operation(row)) for row in due]
+        self._in_flight = {entry_id for entry_id, _ in entries}
+        operations = [operation for _, operation in entries]
+        self.runner.run(
+            "outbox",
+            lambda: self.batcher.mutate(operations),
+            on_result=lambda outcomes: self._sent(entries, outcomes),
+            on_error=lambda error: self._sent(
+                entries, [(operation, None, error) for operation in operations]
+            ),
+        )
+
+    def _sent(self, entries, outcomes):
+        """Record the outcome of a batch, then send what is due next."""
+        rows = {
+            row["id"]: row for row in self._entries(entry_id for entry_id, _ in entries)
+        }
+        succeeded = False
+        reported = []
+        with self._lock, self._conn:
+            for (entry_id, operation), (_, response, error) in zip(entries, outcomes):
+                if error is None or _is_already_done(operation, error):
+                    self._conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+                    reported.append((entry_id, operation, response, None))
+                    succeeded = True
+                elif _is_retryable(error):
+                    attempts = rows[entry_id]["attempts"] + 1
+                    print(f"Error sending task {operation.action}, will retry: {error}")
+                    self._conn.execute(
+                        "UPDATE outbox SET attempts = ?, next_attempt_at = ? WHERE id = ?",
+                        (attempts, time.time() + _retry_delay(attempts), entry_id),
+                    )
+                else:
+                    self._conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+                    reported.append((entry_id, operation, None, error))
+            if succeeded:
+                # The connection works again, retry the others without waiting
+                self._conn.execute(
+                    "UPDATE outbox SET next_attempt_at = ? WHERE attempts > 0",
+                    (time.time(),),
+                )
+        self._in_flight = set()
+
+        done = [entry for entry in reported if entry[3] is None]
+        failed = [entry for entry in reported if entry[3] is not None]
+        if done:
+            self.operations_done.emit([entry[:3] for entry in done])
+        if failed:
+            self.operations_failed.emit(
+                [
+                    (entry_id, operation, error)
+                    for entry_id, operation, _, error in failed
+                ]
+            )
+        for entry_id, operation, response, error in reported:
+            callbacks = self._callbacks.pop(entry_id, [])
+            if error is None:
+                for on_done, _ in callbacks:
+                    if on_done is not None:
+                        on_done(response)
+                continue
+            # Each merged edit restores the snapshot taken before it, so undo
+            # them newest first and end on the state before the oldest edit
+            for _, on_error in reversed(callbacks):
+                if on_error is not None:
+                    on_error(error)
+        self.pending_changed.emit(self.pending_count())
+        self._drain()
+
+    def _entries(self, entry_ids):
+        """Return the rows of some entries."""
+        entry_ids = list(entry_ids)
+        placeholders = ", ".join("?" for _ in entry_ids)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT * FROM outbox WHERE id IN ({placeholders})", entry_ids
+            ).fetchall()
+
+
+def _row_to_operation(row):
+    """Convert an outbox row into a TaskOperation."""
+    return TaskOperation(
+        row["action"],
+        row["task_list_id"],
+        row["task_id"],
+        row["destination_task_list_id"],
+        None if row["body"] is None else json.loads(row["body"]),
+    )
+
+
+def _http_status(error):
+    """Return the HTTP status of an API error, or None for other errors."""
+    if isinstance(error, ApiError):
+        return error.status
+    return None
+
+
+def _is_already_done(operation, error):
+    """Tell whether a failed delete found the task already gone."""
+    return operation.action == "delete" and _http_status(error) in (404, 410)
+
+
+def _is_retryable(error):
+    """Tell whether a failure may go away by itself."""
+    status = _http_status(error)
+    if status is None:
+        # Network failures and timeouts (requests' errors are OSErrors),
+        # including while refreshing the token
+        return isinstance(error, (OSError, TransportError))
+    if status == 403:
+        return "ratelimitexceeded" in str(error).lower()
+    return status in RETRYABLE_STATUSES
+
+
+def _retry_delay(attempts):
+    """Return the seconds to wait before an attempt, with some jitter."""
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+    return delay * random.uniform(0.5, 1.0)
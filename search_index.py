@@ -0,0 +1,171 @@
+"""In-memory full-text index answering substring searches over tasks."""
+
+import re
+from collections import defaultdict
+from typing import List, NamedTuple
+
+_WORD_RE = re.compile(r"\w+")
+
+# Words are looked up through their trigrams once a query token is this long;
+# shorter tokens are matched by scanning the vocabulary.
+_GRAM_LENGTH = 3
+
+
+def _grams(word):
+    """Return the set of trigrams of a word."""
+    return {word[i : i + _GRAM_LENGTH] for i in range(len(word) - _GRAM_LENGTH + 1)}
+
+
+def _search_text(task):
+    """Return the lower-cased text a task is searched by."""
+    return (task.title + "\n" + (task.notes or "")).lower()
+
+
+class SearchIndex:
+    """
+    Case-insensitive substring search over task titles and notes.
+
+    Each task's text is split into words, and every word has a posting set
+    of the task IDs it appears in. A query is split into words the same way;
+    each query word selects the vocabulary words containing it (through a
+    trigram index over the vocabulary), and the union of their postings
+    gives the candidates for that word. Candidates common to every query
+    word are finally checked against the whole query, so results are
+    exactly those of ``query in text``.
+
+    ``version`` increases on every change, so holders of search results can
+    tell when to search again.
+    """
+
+    def __init__(self):
+        self.version = 0
+        # Task ID -> lower-cased search text
+        self._texts = {}
+        # Task ID -> set of words in its text
+        self._words = {}
+        # Word -> set of task IDs
+        self._postings = defaultdict(set)
+        # Trigram -> set of words containing it
+        self._word_grams = defaultdict(set)
+
+    def rebuild(self, tasks):
+        """
+        Replace the indexed tasks.
+
+        :param tasks: Iterable of Task records.
+        """
+        self._texts.clear()
+        self._words.clear()
+        self._postings.clear()
+        self._word_grams.clear()
+        for task in tasks:
+            self._add(task)
+        self.version += 1
+
+    def add(self, task):
+        """
+        Index a task, replacing its previous version if it was indexed.
+
+        :param task: A Task record.
+        """
+        self._remove(task.id)
+        self._add(task)
+        self.version += 1
+
+    def remove(self, task_id):
+        """
+        Drop a task from the index.
+
+        :param task_id: ID of the task; unknown IDs are ignored.
+        """
+        if self._remove(task_id):
+            self.version += 1
+
+    def search(self, query):
+        """
+        Find the tasks whose title or notes contain a text.
+
+        :param query: The text to look for, in any case.
+        :return: Set of matching task IDs, or None for an empty query,
+            meaning every task matches.
+        """
+        query = query.lower()
+        if not query:
+            return None
+
+        candidates = None
+        # Longer words are more selective, so they narrow the candidates first
+        for token in sorted(set(_WORD_RE.findall(query)), key=len, reverse=True):
+            matches = set()
+            for word in self._words_containing(token):
+                matches |= self._postings[word]
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return set()
+        if candidates is None:
+            # Only punctuation or spaces, nothing to look up
+            candidates = self._texts
+        return {task_id for task_id in candidates if query in self._texts[task_id]}
+
+    def __len__(self):
+        return len(self._texts)
+
+    def _add(self, task):
+        """Index a task that is not indexed yet."""
+        text = _search_text(task)
+        words = set(_WORD_RE.findall(text))
+        self._texts[task.id] = text
+        self._words[task.id] = words
+        for word in words:
+            postings = self._postings[word]
+            if not postings:
+                for gram in _grams(word):
+                    self._word_grams[gram].add(word)
+            postings.add(task.id)
+
+    def _remove(self, task_id):
+        """Unindex a task, returning False if it was not indexed."""
+        if self._texts.pop(task_id, None) is None:
+            return False
+        for word in self._words.pop(task_id):
+            postings = self._postings[word]
+            postings.discard(task_id)
+            if not postings:
+                del self._postings[word]
+                for gram in _grams(word):
+                    self._word_grams[gram].discard(word)
+        return True
+
+    def _words_containing(self, token):
+        """Return the vocabulary words containing a query token."""
+        if len(token) < _GRAM_LENGTH:
+            return [word for word in self._postings if token in word]
+        words = None
+        for gram in _grams(token):
+            gram_words = self._word_grams.get(gram)
+            if not gram_words:
+                return []
+            words = set(gram_words) if words is None else words & gram_words
+        return [word for word in words if token in word]
+
+
+class IndexedTasks(NamedTuple):
+    """Tasks loaded for display, along with their search index."""
+
+    tasks: List
+    search_index: SearchIndex
+
+
+def index_tasks(tasks):
+    """
+    Build the search index of freshly loaded tasks.
+
+    Indexing thousands of notes takes a noticeable time, so background jobs
+    loading tasks call this before handing them to the GUI thread.
+
+    :param tasks: List of Task records.
+    :return: IndexedTasks.
+    """
+    search_index = SearchIndex()
+    search_index.rebuild(tasks)
+    return IndexedTasks(tasks, search_index)
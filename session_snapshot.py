@@ -0,0 +1,63 @@
+"""What the window showed at the end of the previous session."""
+
+import json
+import sqlite3
+import threading
+
+from db_init import DB_PATH, init_db
+
+
+class SessionSnapshot:
+    """
+    Named JSON values saved when the window closes and read at the next start.
+
+    The window uses them to draw the user profile, the filter counts and
+    the last shown task list or filter before any API call, then brings
+    them up to date in the background. The values are only hints: a
+    missing or outdated one just means waiting for the API as before.
+    """
+
+    def __init__(self, path=DB_PATH):
+        """
+        :param path: Path of the SQLite database file.
+        """
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        init_db(self._conn)
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def load(self):
+        """
+        Return every saved value.
+
+        :return: Dictionary of name to value.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, value FROM session_snapshot"
+            ).fetchall()
+        return {name: json.loads(value) for name, value in rows}
+
+    def save(self, values):
+        """
+        Save values, replacing those with the same names.
+
+        :param values: Dictionary of name to JSON serializable value; a None
+            value deletes the saved one.
+        """
+        with self._lock, self._conn:
+            for name, value in values.items():
+                if value is None:
+                    self._conn.execute(
+                        "DELETE FROM session_snapshot WHERE name = ?", (name,)
+                    )
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO session_snapshot (name, value) "
+                        "VALUES (?, ?)",
+                        (name, json.dumps(value)),
+                    )
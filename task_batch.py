@@ -0,0 +1,178 @@
+"""Batched Google Tasks API requests for multi-list reads and bulk mutations."""
+
+from typing import NamedTuple, Optional
+
+from http_pool import ParallelFetcher
+from task_fields import VIEW_TASK_FIELDS, VIEW_TASKS_PAGE_FIELDS
+from tasks_client import (
+    delete_task_request,
+    list_tasks_request,
+    move_task_request,
+    patch_task_request,
+)
+
+# Maximum number of requests sent in one batch HTTP round trip
+BATCH_SIZE = 50
+
+
+class TaskOperation(NamedTuple):
+    """A single mutation of a task, as sent by TaskBatcher.mutate()."""
+
+    action: str  # "complete", "edit", "delete" or "move"
+    task_list_id: str
+    task_id: str
+    destination_task_list_id: Optional[str] = None
+    # Fields to patch, for "edit"
+    body: Optional[dict] = None
+
+
+class TaskBatcher:
+    """
+    Groups Tasks API requests into batch round trips of up to BATCH_SIZE.
+
+    Independent batches are sent concurrently through a ParallelFetcher,
+    sharing the keep-alive connections of the TasksClient.
+    """
+
+    def __init__(self, tasks_client, http_pool, fetcher=None):
+        """
+        :param tasks_client: The TasksClient sending the requests.
+        :param http_pool: The HttpPool of the other Google APIs.
+        :param fetcher: Optional ParallelFetcher to share with other layers.
+        """
+        self.tasks_client = tasks_client
+        self.http_pool = http_pool
+        self.fetcher = fetcher or ParallelFetcher(http_pool)
+
+    def list_tasks(self, queries, on_page=None):
+        """
+        List the tasks of several task lists, following pagination.
+
+        The first page of every list goes out in one batch round; lists
+        that returned a ``nextPageToken`` are batched again in the next
+        round until every list is exhausted.
+
+        :param queries: Mapping of task list ID to extra tasks().list()
+            parameters, e.g. ``{"updatedMin": ...}``. Tasks are projected
+            on VIEW_TASKS_PAGE_FIELDS unless a query gives its own
+            ``fields``, None asking for full resources.
+        :param on_page: Optional callable taking a task list ID and the
+            tasks of one of its pages, called as each page arrives.
+        :return: Tuple ``(tasks_by_list, errors_by_list)`` of dictionaries
+            keyed by task list ID.
+        """
+        tasks_by_list = {task_list_id: [] for task_list_id in queries}
+        errors_by_list = {}
+        page_tokens = {task_list_id: None for task_list_id in queries}
+        while page_tokens:
+            requests = {
+                task_list_id: list_tasks_request(
+                    task_list_id,
+                    page_token,
+                    showHidden=True,
+                    **{"fields": VIEW_TASKS_PAGE_FIELDS, **queries[task_list_id]},
+                )
+                for task_list_id, page_token in page_tokens.items()
+            }
+            page_tokens = {}
+            for task_list_id, response, error in self.execute(requests):
+                if error is not None:
+                    errors_by_list[task_list_id] = error
+                    tasks_by_list.pop(task_list_id, None)
+                    continue
+                tasks_by_list[task_list_id].extend(response.get("items", []))
+                if on_page is not None:
+                    on_page(task_list_id, response.get("items", []))
+                if response.get("nextPageToken"):
+                    page_tokens[task_list_id] = response["nextPageToken"]
+        return tasks_by_list, errors_by_list
+
+    def mutate(self, operations):
+        """
+        Send task mutations in batches.
+
+        :param operations: Iterable of TaskOperation.
+        :return: List of ``(operation, response, error)`` tuples in input order.
+        """
+        operations = list(operations)
+        requests = {
+            index: self._build_mutation(operation)
+            for index, operation in enumerate(operations)
+        }
+        outcomes = {
+            index: (response, error)
+            for index, response, error in self.execute(requests)
+        }
+        return [
+            (operation, *outcomes[index]) for index, operation in enumerate(operations)
+        ]
+
+    def execute(self, requests):
+        """
+        Execute keyed API requests in batches of up to BATCH_SIZE.
+
+        A single request is executed directly, without the batch envelope.
+
+        :param requests: Mapping of key to ApiRequest.
+        :return: List of ``(key, response, error)`` tuples.
+        """
+        keys = list(requests)
+        if len(keys) == 1:
+            key = keys[0]
+            try:
+                return [(key, self.tasks_client.execute(requests[key]), None)]
+            except Exception as e:
+                return [(key, None, e)]
+
+        chunks = [
+            keys[start : start + BATCH_SIZE]
+            for start in range(0, len(keys), BATCH_SIZE)
+        ]
+        outcomes = []
+        for chunk, chunk_outcomes, error in self.fetcher.map(
+            lambda chunk: self._execute_chunk(chunk, requests), chunks
+        ):
+            if error is not None:
+                # The whole round trip failed, so every request in it did
+                outcomes.extend((key, None, error) for key in chunk)
+            else:
+                outcomes.extend(chunk_outcomes)
+        return outcomes
+
+    def _execute_chunk(self, keys, requests):
+        """Send one batch round trip and collect its per-request outcomes."""
+        outcomes = self.tasks_client.execute_batch([requests[key] for key in keys])
+        return [
+            (key, response, error) for key, (response, error) in zip(keys, outcomes)
+        ]
+
+    def _build_mutation(self, operation):
+        """
+        Build the API request carrying out a TaskOperation.
+
+        The updated task is answered with the fields the views use only.
+        """
+        if operation.action == "complete":
+            return patch_task_request(
+                operation.task_list_id,
+                operation.task_id,
+                {"status": "completed"},
+                VIEW_TASK_FIELDS,
+            )
+        if operation.action == "edit":
+            return patch_task_request(
+                operation.task_list_id,
+                operation.task_id,
+                operation.body,
+                VIEW_TASK_FIELDS,
+            )
+        if operation.action == "delete":
+            return delete_task_request(operation.task_list_id, operation.task_id)
+        if operation.action == "move":
+            return move_task_request(
+                operation.task_list_id,
+                operation.task_id,
+                operation.destination_task_list_id,
+                VIEW_TASK_FIELDS,
+            )
+        raise ValueError(f"Unknown task operation: {operation.action}")
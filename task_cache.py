@@ -0,0 +1,479 @@
+"""Local SQLite cache of Google Task lists and their tasks."""
+
+import re
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+from db_init import DB_PATH, init_db
+from task_record import Task, parse_timestamp
+
+# Seconds after which a cached task list is synced again with the API
+CACHE_MAX_AGE = 300
+
+# Task resource fields stored in the tasks table
+TASK_FIELDS = (
+    "id",
+    "etag",
+    "title",
+    "updated",
+    "selfLink",
+    "parent",
+    "position",
+    "notes",
+    "status",
+    "due",
+    "completed",
+    "deleted",
+    "hidden",
+    "webViewLink",
+)
+
+# Task resource fields that partial responses leave out (see task_fields);
+# a task written without them keeps the values already cached
+KEPT_TASK_FIELDS = ("etag", "selfLink", "webViewLink")
+
+# Task resource fields holding RFC 3339 timestamps, stored as epoch milliseconds
+TIMESTAMP_FIELDS = ("updated", "due", "completed")
+
+# Characters surrounding the matched terms in SearchHit.highlight
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+# Maximum number of results returned by TaskCache.search()
+SEARCH_LIMIT = 500
+
+# Task list resource fields stored in the task_lists table
+TASK_LIST_FIELDS = ("kind", "id", "etag", "title", "updated", "selfLink")
+
+
+class SearchHit(NamedTuple):
+    """A task found by TaskCache.search()."""
+
+    task: Task
+    # The title, followed by an excerpt of the notes when they matched, with
+    # matched terms between HIGHLIGHT_START and HIGHLIGHT_END
+    highlight: str
+
+
+class TaskCache:
+    """
+    Persistent store of task lists and tasks.
+
+    Task resources are written as returned by the Google Tasks API and read
+    back as Task records. The connection is shared between threads and
+    guarded by a lock.
+    """
+
+    def __init__(self, path=DB_PATH):
+        """
+        Open (and create if needed) the cache database.
+
+        :param path: Path of the SQLite database file.
+        """
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        init_db(self._conn)
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def save_task_lists(self, task_lists):
+        """
+        Store the given task lists, forgetting lists that no longer exist.
+
+        :param task_lists: Task list resources as returned by the API.
+        """
+        rows = [
+            tuple(task_list.get(field) for field in TASK_LIST_FIELDS)
+            for task_list in task_lists
+        ]
+        ids = [task_list["id"] for task_list in task_lists]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO task_lists (kind, id, etag, title, updated, selfLink)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    kind = excluded.kind,
+                    etag = excluded.etag,
+                    title = excluded.title,
+                    updated = excluded.updated,
+                    selfLink = excluded.selfLink
+                """,
+                rows,
+            )
+            placeholders = ", ".join("?" for _ in ids)
+            self._conn.execute(
+                f"DELETE FROM tasks WHERE task_list_id NOT IN ({placeholders})", ids
+            )
+            self._conn.execute(
+                f"DELETE FROM task_lists WHERE id NOT IN ({placeholders})", ids
+            )
+
+    def get_task_lists(self):
+        """
+        Return the cached task lists ordered by title.
+
+        :return: List of task list dictionaries.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, id, etag, title, updated, selfLink FROM task_lists "
+                "ORDER BY title COLLATE NOCASE"
+            ).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def is_fresh(self, task_list_id, max_age=CACHE_MAX_AGE):
+        """
+        Check whether the tasks of a list were synced recently enough.
+
+        :param task_list_id: ID of the task list.
+        :param max_age: Maximum age in seconds of the cached tasks.
+        :return: True if the cached tasks can be used without syncing.
+        """
+        state = self.get_sync_state(task_list_id)
+        if state is None or state["synced_updated"] is None:
+            return False
+        return time.time() - state["synced_at"] < max_age
+
+    def invalidate(self, task_list_id):
+        """
+        Mark the cached tasks of a list as stale so the next read syncs them.
+
+        The last sync time is kept, so the next sync is still incremental.
+
+        :param task_list_id: ID of the task list.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE task_lists SET synced_updated = NULL WHERE id = ?",
+                (task_list_id,),
+            )
+
+    def get_sync_state(self, task_list_id):
+        """
+        Return the bookkeeping recorded by the last sync of a list.
+
+        :param task_list_id: ID of the task list.
+        :return: Dictionary with ``synced_at``, ``synced_etag`` and
+            ``synced_updated``, or None if the list was never synced.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at, synced_etag, synced_updated FROM task_lists "
+                "WHERE id = ?",
+                (task_list_id,),
+            ).fetchone()
+        if row is None or row["synced_at"] is None:
+            return None
+        return dict(row)
+
+    def set_sync_state(self, task_list_id, synced_at, etag, updated):
+        """
+        Record a successful sync of a list.
+
+        :param task_list_id: ID of the task list.
+        :param synced_at: Epoch time the sync started at.
+        :param etag: The task list etag seen by the sync.
+        :param updated: The task list ``updated`` timestamp seen by the sync.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE task_lists SET synced_at = ?, synced_etag = ?, "
+                "synced_updated = ? WHERE id = ?",
+                (synced_at, etag, updated, task_list_id),
+            )
+
+    def save_tasks(self, task_list_id, tasks):
+        """
+        Replace the cached tasks of a list with a complete fresh copy.
+
+        :param task_list_id: ID of the task list the tasks belong to.
+        :param tasks: Every task resource of the list, including hidden ones.
+        """
+        rows = [_task_to_row(task, task_list_id) for task in tasks]
+        ids = [task["id"] for task in tasks]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO task_lists (id, title) VALUES (?, '')",
+                (task_list_id,),
+            )
+            placeholders = ", ".join("?" for _ in ids)
+            self._conn.execute(
+                f"DELETE FROM tasks WHERE task_list_id = ? AND id NOT IN ({placeholders})",
+                [task_list_id, *ids],
+            )
+            self._conn.executemany(_UPSERT_TASK_SQL, rows)
+
+    def merge_tasks(self, task_list_id, changed_tasks):
+        """
+        Apply a set of changed tasks to the cached copy of a list.
+
+        Tasks flagged as ``deleted`` are tombstones and are removed from this
+        list only, since the task may have moved to another one. Every
+        other task is inserted or updated.
+
+        :param task_list_id: ID of the task list the tasks belong to.
+        :param changed_tasks: Task resources changed since the last sync.
+        """
+        deleted_ids = [
+            (task["id"], task_list_id) for task in changed_tasks if task.get("deleted")
+        ]
+        rows = [
+            _task_to_row(task, task_list_id)
+            for task in changed_tasks
+            if not task.get("deleted")
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM tasks WHERE id = ? AND task_list_id = ?", deleted_ids
+            )
+            self._conn.executemany(_UPSERT_TASK_SQL, rows)
+
+    def put_tasks(self, tasks):
+        """
+        Insert or update tasks from Task records.
+
+        Used for local edits that the API has not confirmed yet; fields that
+        Task records do not carry, such as the etag, are left unchanged.
+
+        :param tasks: Iterable of Task records.
+        """
+        rows = [
+            (
+                task.id,
+                task.title,
+                task.notes,
+                task.status,
+                task.due,
+                task.completed,
+                task.updated,
+                task.parent,
+                task.position,
+                int(task.hidden),
+                task.web_view_link,
+                task.task_list_id,
+            )
+            for task in tasks
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(_PUT_TASK_SQL, rows)
+
+    def set_web_view_link(self, task_id, web_view_link):
+        """
+        Store the web link of a task, loaded separately from its other fields.
+
+        :param task_id: ID of the task; an unknown ID is ignored.
+        :param web_view_link: URL of the task in the Google Tasks web UI.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE tasks SET webViewLink = ? WHERE id = ?",
+                (web_view_link, task_id),
+            )
+
+    def delete_tasks(self, task_ids):
+        """
+        Remove tasks.
+
+        :param task_ids: Iterable of task IDs; unknown IDs are ignored.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in task_ids]
+            )
+
+    def get_tasks_by_id(self, task_ids):
+        """
+        Return some cached tasks.
+
+        :param task_ids: Iterable of task IDs.
+        :return: List of Task records, without the IDs that are not cached.
+        """
+        task_ids = list(task_ids)
+        tasks = []
+        # Keep under SQLite's limit of bound parameters
+        for start in range(0, len(task_ids), 500):
+            chunk = task_ids[start : start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            with self._lock:
+                rows = self._conn.execute(
+                    _SELECT_TASKS_SQL + f" WHERE t.id IN ({placeholders})", chunk
+                ).fetchall()
+            tasks.extend(_row_to_task(row) for row in rows)
+        return tasks
+
+    def get_tasks(self, task_list_id, include_hidden=False):
+        """
+        Return the cached tasks of a single list.
+
+        :param task_list_id: ID of the task list.
+        :param include_hidden: Whether to include hidden (cleared) tasks.
+        :return: List of Task records.
+        """
+        query = _SELECT_TASKS_SQL + " WHERE t.task_list_id = ?"
+        if not include_hidden:
+            query += " AND NOT COALESCE(t.hidden, 0)"
+        query += " ORDER BY t.position"
+        with self._lock:
+            rows = self._conn.execute(query, (task_list_id,)).fetchall()
+        return [_row_to_task(row) for row in rows]
+
+    def get_all_tasks(self, include_hidden=False):
+        """
+        Return the cached tasks of every list.
+
+        :param include_hidden: Whether to include hidden (cleared) tasks.
+        :return: List of Task records.
+        """
+        query = _SELECT_TASKS_SQL
+        if not include_hidden:
+            query += " WHERE NOT COALESCE(t.hidden, 0)"
+        query += " ORDER BY l.title COLLATE NOCASE, t.position"
+        with self._lock:
+            rows = self._conn.execute(query).fetchall()
+        return [_row_to_task(row) for row in rows]
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """
+        Full-text search of the title and notes of every cached task.
+
+        Each word of the text matches words starting with it, and a task
+        must match every word. Results are ranked by bm25, title matches
+        weighing more than notes matches. Hidden (cleared) tasks are
+        included, so completed history is searched too.
+
+        :param text: The text typed by the user.
+        :param limit: Maximum number of results.
+        :return: List of SearchHit, best match first.
+        """
+        match = _fts_query(text)
+        if not match:
+            return []
+        query = f"""
+            SELECT {_SELECT_TASK_COLUMNS},
+                   highlight(tasks_fts, 0, :start, :end) AS title_highlight,
+                   snippet(tasks_fts, 1, :start, :end, '…', 12) AS notes_snippet
+            FROM tasks_fts
+            JOIN tasks t ON t.rowid = tasks_fts.rowid
+            LEFT JOIN task_lists l ON l.id = t.task_list_id
+            WHERE tasks_fts MATCH :match
+            ORDER BY bm25(tasks_fts, 5.0, 1.0)
+            LIMIT :limit
+        """
+        params = {
+            "match": match,
+            "start": HIGHLIGHT_START,
+            "end": HIGHLIGHT_END,
+            "limit": limit,
+        }
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [SearchHit(_row_to_task(row), _search_highlight(row)) for row in rows]
+
+
+_UPSERT_TASK_SQL = f"""
+INSERT INTO tasks ({", ".join(TASK_FIELDS)}, task_list_id)
+VALUES ({", ".join("?" for _ in TASK_FIELDS)}, ?)
+ON CONFLICT(id) DO UPDATE SET
+    {", ".join(
+        f"{field} = COALESCE(excluded.{field}, tasks.{field})"
+        if field in KEPT_TASK_FIELDS
+        else f"{field} = excluded.{field}"
+        for field in TASK_FIELDS[1:]
+    )},
+    task_list_id = excluded.task_list_id
+"""
+
+_PUT_TASK_SQL = """
+INSERT INTO tasks (id, title, notes, status, due, completed, updated, parent,
+                   position, hidden, webViewLink, task_list_id)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    title = excluded.title,
+    notes = excluded.notes,
+    status = excluded.status,
+    due = excluded.due,
+    completed = excluded.completed,
+    updated = excluded.updated,
+    parent = excluded.parent,
+    position = excluded.position,
+    hidden = excluded.hidden,
+    webViewLink = COALESCE(excluded.webViewLink, tasks.webViewLink),
+    task_list_id = excluded.task_list_id
+"""
+
+_SELECT_TASK_COLUMNS = """
+t.id, t.task_list_id, t.title, t.notes, t.status, t.due, t.completed,
+t.updated, t.parent, t.position, t.hidden, t.webViewLink,
+l.title AS tasklist_name
+"""
+
+_SELECT_TASKS_SQL = f"""
+SELECT {_SELECT_TASK_COLUMNS}
+FROM tasks t LEFT JOIN task_lists l ON l.id = t.task_list_id
+"""
+
+
+def _task_to_row(task, task_list_id):
+    """Convert a task resource into a tuple matching ``_UPSERT_TASK_SQL``."""
+    values = [task.get(field) for field in TASK_FIELDS]
+    for field in TIMESTAMP_FIELDS:
+        index = TASK_FIELDS.index(field)
+        values[index] = parse_timestamp(values[index])
+    for field in ("deleted", "hidden"):
+        index = TASK_FIELDS.index(field)
+        values[index] = int(bool(values[index]))
+    return (*values, task_list_id)
+
+
+def _row_to_task(row):
+    """Convert a row selected with ``_SELECT_TASKS_SQL`` into a Task."""
+    return Task(
+        row["id"],
+        row["task_list_id"],
+        title=row["title"],
+        notes=row["notes"],
+        status=row["status"],
+        due=row["due"],
+        completed=row["completed"],
+        updated=row["updated"],
+        parent=row["parent"],
+        position=row["position"],
+        hidden=row["hidden"],
+        web_view_link=row["webViewLink"],
+        tasklist_name=row["tasklist_name"],
+    )
+
+
+def _fts_query(text):
+    """
+    Turn user input into an FTS5 query matching every word as a prefix.
+
+    Only word characters are kept, so FTS5 operators typed by the user
+    are searched as plain text instead of breaking the query.
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def _search_highlight(row):
+    """Build SearchHit.highlight from a row selected by TaskCache.search()."""
+    highlight = row["title_highlight"] or ""
+    notes_snippet = row["notes_snippet"]
+    if notes_snippet and HIGHLIGHT_START in notes_snippet:
+        highlight += " — " + notes_snippet.replace("\n", " ")
+    return highlight
+
+
+def _row_to_dict(row):
+    """
+    Convert a database row into an API-shaped dictionary.
+
+    NULL columns are left out, like absent fields in API responses.
+    """
+    return {key: row[key] for key in row.keys() if row[key] is not None}
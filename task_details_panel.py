@@ -1,8 +1,7 @@
 import re
 import webbrowser
-import requests
-from PySide6.QtCore import Qt, QUrl
-from PySide6.QtGui import QPixmap, QDesktopServices
+from PySide6.QtCore import QTimer, QUrl
+from PySide6.QtGui import QDesktopServices
 from PySide6.QtWidgets import (
     QGroupBox,
     QFormLayout,
@@ -15,7 +14,17 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QComboBox,
 )
-from youtube import get_youtube_video_info
+from youtube import extract_video_id
+from youtube_cache import lookup_videos
+from image_cache import scaled_image
+from task_fields import DETAIL_TASK_FIELDS
+from task_record import format_timestamp
+
+# Delay after the last selection change before enrichment is looked up
+ENRICHMENT_DELAY_MS = 150
+
+# Background channels of the enrichment of the selected task
+ENRICHMENT_CHANNELS = ("task_enrichment", "task_details", "youtube_thumbnail")
 
 
 class TaskDetailsPanel(QGroupBox):
@@ -26,7 +35,7 @@ class TaskDetailsPanel(QGroupBox):
 
     def __init__(self, table):
         """
-        :param table: The QTableWidget used to get the selected items.
+        :param table: The QTableView of tasks, whose model is a TaskFilterProxyModel.
         """
         super().__init__("Task Details")
         self._table = table
@@ -34,6 +43,22 @@ class TaskDetailsPanel(QGroupBox):
         self.setVisible(False)
         self._create_ui()
 
+        # Bumped on every selection change; enrichment results carry the
+        # generation they were requested for and are dropped once stale
+        self._generation = 0
+        self._enrichment_text = ""
+        # Task records the actions apply to
+        self.selected_tasks = []
+        self.current_task = None
+        self.current_task_id = None
+        # Detail fields loaded this session by task ID, see _show_details
+        self._task_details = {}
+        # Enrichment is looked up once the selection settles
+        self._enrichment_timer = QTimer(self)
+        self._enrichment_timer.setSingleShot(True)
+        self._enrichment_timer.setInterval(ENRICHMENT_DELAY_MS)
+        self._enrichment_timer.timeout.connect(self._start_enrichment)
+
     def _create_ui(self):
         """
         Set up the form layout, fields, and buttons for the task panel.
@@ -43,6 +68,8 @@ class TaskDetailsPanel(QGroupBox):
         self.detail_updated_field = QLineEdit()
         self.detail_due_field = QLineEdit()
         self.detail_notes_field = QTextEdit()
+        self.detail_title_field.textEdited.connect(self._update_save_button)
+        self.detail_notes_field.textChanged.connect(self._update_save_button)
 
         self.view_task_in_browser_button = QPushButton("Open Task in Browser")
         self.view_task_in_browser_button.setEnabled(False)
@@ -56,6 +83,11 @@ class TaskDetailsPanel(QGroupBox):
         self.complete_task_button.setEnabled(False)
         self.complete_task_button.clicked.connect(self.mark_task_complete)
         
+        # Add Save button, for the title and notes
+        self.save_task_button = QPushButton("Save")
+        self.save_task_button.setEnabled(False)
+        self.save_task_button.clicked.connect(self.save_task)
+
         # Add Delete Task button
         self.delete_task_button = QPushButton("Delete Task")
         self.delete_task_button.setEnabled(False)
@@ -75,6 +107,7 @@ class TaskDetailsPanel(QGroupBox):
         move_task_layout.addWidget(self.move_task_button)
         
         # Add buttons to action layout
+        action_buttons_layout.addWidget(self.save_task_button)
         action_buttons_layout.addWidget(self.complete_task_button)
         action_buttons_layout.addWidget(self.delete_task_button)
 
@@ -122,35 +155,140 @@ class TaskDetailsPanel(QGroupBox):
         """
         Populate the panel from the current table selection.
         Hide if nothing is selected.
+
+        Fields of the task itself and the move targets are shown at once.
+        YouTube details, web links and the fields the task views do not
+        download (see task_fields) are looked up in the background once the
+        selection has not changed for ENRICHMENT_DELAY_MS. When several
+        tasks are selected, the panel offers the bulk actions instead.
         """
-        selected_items = self._table.selectedItems()
-        if not selected_items:
+        self._generation += 1
+        self._enrichment_timer.stop()
+        for channel in ENRICHMENT_CHANNELS:
+            self.window().runner.cancel(channel)
+        self._clear_enrichment()
+
+        selected_rows = self._table.selectionModel().selectedRows()
+        if not selected_rows:
             self.clear_details_panel()
             self.setVisible(False)
             return
 
         self.setVisible(True)
-        row = selected_items[0].row()
-        title_item = self._table.item(row, 0)
-        if not title_item:
+        tasks = self._selected_tasks()
+        if len(tasks) > 1:
+            self._show_selection_summary(tasks)
+            self.show_task_lists(self.window().task_list_directory.task_lists())
             return
 
-        # Get task data from item
-        self.current_task_id = title_item.data(Qt.UserRole)  # Store task ID
-        self.current_task_list_id = title_item.data(Qt.UserRole + 1)  # Store task list ID
-        updated = title_item.data(Qt.UserRole + 2)
-        notes = title_item.data(Qt.UserRole + 3)
-        web_link = title_item.data(Qt.UserRole + 4)
-        due_date = title_item.data(Qt.UserRole + 5)
-        completed_date = title_item.data(Qt.UserRole + 6)
-        status = title_item.data(Qt.UserRole + 7)
-
-        self.detail_title_field.setText(title_item.text())
+        task = tasks[0]
+        self._show_task_fields(task)
+        self.show_task_lists(self.window().task_list_directory.task_lists())
+
+        self._enrichment_text = task.title + " " + (task.notes or "")
+        self._enrichment_timer.start()
+
+    def refresh_tasks(self, task_ids):
+        """
+        Show the current version of the selected tasks after a local change.
+
+        Enrichment is kept, and so are unsaved edits of the title and notes.
+
+        :param task_ids: IDs of the changed tasks; changes of other tasks
+            are ignored.
+        """
+        if self.isHidden() or not set(task_ids) & {task.id for task in self.selected_tasks}:
+            return
+        tasks = self._selected_tasks()
+        if len(tasks) > 1:
+            self._show_selection_summary(tasks)
+        elif tasks and tasks[0].id == self.current_task_id:
+            # Keep what the user is typing
+            edits = self._edited_fields(self.current_task)
+            self._show_task_fields(tasks[0])
+            if "title" in edits:
+                self.detail_title_field.setText(edits["title"])
+            if "notes" in edits:
+                self.detail_notes_field.setPlainText(edits["notes"] or "")
+            self._update_save_button()
+        else:
+            return
+        self.show_task_lists(self.window().task_list_directory.task_lists())
+
+    def _selected_tasks(self):
+        """Return the Task records of the selected rows, in table order."""
+        model = self._table.model()
+        rows = sorted(self._table.selectionModel().selectedRows(), key=lambda index: index.row())
+        return [model.task_for_index(index) for index in rows]
+
+    def _show_selection_summary(self, tasks):
+        """
+        Offer the bulk actions on several selected tasks.
+
+        :param tasks: The selected Task records.
+        """
+        self.selected_tasks = tasks
+        self.current_task = None
+        self.current_task_id = None
+        # Lists the tasks can be moved to exclude theirs only if they share it
+        task_list_ids = {task.task_list_id for task in tasks}
+        self.current_task_list_id = task_list_ids.pop() if len(task_list_ids) == 1 else None
+        count = len(tasks)
+        self.setTitle(f"{count} Tasks Selected")
+        for field in (
+            self.detail_title_field,
+            self.detail_updated_field,
+            self.detail_due_field,
+            self.detail_notes_field,
+        ):
+            field.clear()
+            field.setEnabled(False)
+        self.selected_task_link = ""
+        self.view_task_in_browser_button.setEnabled(False)
+        self.save_task_button.setEnabled(False)
+        self.complete_task_button.setText(f"Mark {count} as Complete")
+        self.complete_task_button.setEnabled(
+            any(not task.is_completed for task in tasks)
+        )
+        self.delete_task_button.setText(f"Delete {count} Tasks")
+        self.delete_task_button.setEnabled(True)
+
+    def _show_task_fields(self, task):
+        """
+        Display the fields of the task itself.
+
+        :param task: The selected Task record.
+        """
+        # Get task data from the model
+        self.selected_tasks = [task]
+        self.current_task = task
+        self.current_task_id = task.id  # Store task ID
+        self.current_task_list_id = task.task_list_id  # Store task list ID
+        title = task.title
+        updated = format_timestamp(task.updated)
+        notes = task.notes
+        web_link = task.web_view_link
+        due_date = format_timestamp(task.due)
+        completed_date = format_timestamp(task.completed)
+        status = task.status
+
+        self.setTitle("Task Details")
+        for field in (
+            self.detail_title_field,
+            self.detail_updated_field,
+            self.detail_due_field,
+            self.detail_notes_field,
+        ):
+            field.setEnabled(True)
+        self.complete_task_button.setText("Mark as Complete")
+        self.delete_task_button.setText("Delete Task")
+        self.detail_title_field.setText(title)
         self.detail_updated_field.setText(updated)
         self.detail_notes_field.setPlainText(notes or "")
         self.selected_task_link = web_link or ""
         self.view_task_in_browser_button.setEnabled(bool(self.selected_task_link))
         
+        self.save_task_button.setEnabled(False)
         # Enable/disable action buttons based on status
         self.complete_task_button.setEnabled(status != "completed")
         self.delete_task_button.setEnabled(True)  # Always enable delete button
@@ -160,45 +298,106 @@ class TaskDetailsPanel(QGroupBox):
         else:
             self.detail_due_field.setText(due_date or "")
 
-        combined_text = title_item.text() + " " + (notes or "")
-        video_info = get_youtube_video_info(combined_text)
-        if video_info:
-            self._show_youtube_info(video_info)
-        else:
-            self.youtube_info_group_box.setVisible(False)
-            self.youtube_open_button.setEnabled(False)
-
-        match = re.search(r"https?://[^\s]+", combined_text)
-        if (
-            match
-            and "youtube.com" not in match.group(0)
-            and "youtu.be" not in match.group(0)
-        ):
-            self._show_web_link(match.group(0))
+    def _clear_enrichment(self):
+        """Hide what was looked up for the previously selected task."""
+        self.youtube_info_group_box.setVisible(False)
+        self.youtube_open_button.setEnabled(False)
+        self.youtube_thumbnail_label.clear()
+        self.web_group_box.setVisible(False)
+        self.open_web_link_button.setVisible(False)
+        self.open_web_link_button.setEnabled(False)
+
+    def _start_enrichment(self):
+        """Look up the enrichment of the selected task in the background."""
+        parent_window = self.window()
+        generation = self._generation
+        text = self._enrichment_text
+        parent_window.runner.run(
+            "task_enrichment",
+            lambda: fetch_task_enrichment(text, parent_window.video_cache),
+            on_result=lambda enrichment: self._show_enrichment(generation, enrichment),
+            on_error=lambda e: print(f"Error loading task details: {e}"),
+        )
+        task = self.current_task
+        if task is None:
+            return
+        details = self._task_details.get(task.id)
+        if details is not None:
+            self._show_details(generation, details)
         else:
-            self.web_group_box.setVisible(False)
-            self.open_web_link_button.setVisible(False)
-            self.open_web_link_button.setEnabled(False)
+            parent_window.runner.run(
+                "task_details",
+                lambda: parent_window.tasks_client.get_task(
+                    task.task_list_id, task.id, DETAIL_TASK_FIELDS
+                ),
+                on_result=lambda details: self._show_details(generation, details),
+                on_error=lambda e: print(f"Error loading task details: {e}"),
+            )
+
+    def _show_details(self, generation, details):
+        """
+        Store and display the detail fields of a task.
 
-        # Enable the move controls
-        self.task_lists_combo.setEnabled(True)
-        self.move_task_button.setEnabled(True)
+        The web link is also kept in the cache and the table model. The
+        details are remembered for the session, so the first link attached
+        to the task (e.g. the email it was created from) shows again when the
+        task is reselected, unless the text had one.
+
+        :param generation: The selection generation it was requested for.
+        :param details: Task resource projected on DETAIL_TASK_FIELDS.
+        """
+        parent_window = self.window()
+        web_view_link = details.get("webViewLink")
+        if web_view_link and details["id"] not in self._task_details:
+            parent_window.task_cache.set_web_view_link(details["id"], web_view_link)
+            model = parent_window.task_model
+            for row in model.rows_of([details["id"]]).values():
+                task = model.task_at(row).replace(web_view_link=web_view_link)
+                model.replace_tasks([task])
+        self._task_details[details["id"]] = details
+        if generation != self._generation:
+            return
+        if web_view_link:
+            self.current_task = self.current_task.replace(web_view_link=web_view_link)
+            self.selected_tasks = [self.current_task]
+            self.selected_task_link = web_view_link
+            self.view_task_in_browser_button.setEnabled(True)
+        links = details.get("links") or []
+        if links and not self.open_web_link_button.isEnabled():
+            self._show_web_link(links[0]["link"])
+
+    def _show_enrichment(self, generation, enrichment):
+        """
+        Display the result of fetch_task_enrichment, unless the selection changed.
 
-        # Update task lists combo box
-        self.update_task_lists_combo()
+        :param generation: The selection generation it was requested for.
+        :param enrichment: Tuple of YouTube info and web link.
+        """
+        if generation != self._generation:
+            return
+        youtube_info, web_link = enrichment
+        if youtube_info:
+            self._show_youtube_info(youtube_info)
+        if web_link:
+            self._show_web_link(web_link)
 
     def _show_youtube_info(self, info):
-        """Display YouTube thumbnail and metadata."""
+        """Display YouTube metadata, and the thumbnail once loaded."""
         self.youtube_info_group_box.setVisible(True)
         self.youtube_title_label.setText(f"Title: {info['title']}")
         self.youtube_channel_label.setText(f"Channel: {info['channel']}")
         self.youtube_duration_label.setText(f"Duration: {info['duration']}")
-        thumb_data = requests.get(info["thumbnail"]).content
-        pixmap = QPixmap()
-        pixmap.loadFromData(thumb_data)
-        self.youtube_thumbnail_label.setPixmap(
-            pixmap.scaled(160, 90, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        )
+        self.youtube_thumbnail_label.clear()
+        if info["thumbnail"]:
+            generation = self._generation
+            self.window().image_cache.request_pixmap(
+                self.window().runner,
+                "youtube_thumbnail",
+                info["thumbnail"],
+                "thumbnail-160x90",
+                scaled_image(160, 90),
+                lambda pixmap: self._show_thumbnail(generation, pixmap),
+            )
         youtube_url = f"https://www.youtube.com/watch?v={info['video_id']}"
         try:
             self.youtube_open_button.clicked.disconnect()
@@ -207,6 +406,11 @@ class TaskDetailsPanel(QGroupBox):
         self.youtube_open_button.setEnabled(True)
         self.youtube_open_button.clicked.connect(lambda: webbrowser.open(youtube_url))
 
+    def _show_thumbnail(self, generation, pixmap):
+        """Display a loaded YouTube thumbnail, unless the selection changed."""
+        if generation == self._generation:
+            self.youtube_thumbnail_label.setPixmap(pixmap)
+
     def _show_web_link(self, link):
         """Display a button to open external web links."""
         self.web_group_box.setVisible(True)
@@ -223,111 +427,133 @@ class TaskDetailsPanel(QGroupBox):
         if hasattr(self, "selected_task_link") and self.selected_task_link:
             QDesktopServices.openUrl(QUrl(self.selected_task_link))
 
+    def _update_save_button(self):
+        """Enable the Save button while the title or notes differ from the task."""
+        task = self.current_task
+        self.save_task_button.setEnabled(
+            task is not None and self._edited_fields(task) != {}
+        )
+
+    def _edited_fields(self, task):
+        """Return the title and notes fields that differ from a task."""
+        fields = {
+            "title": self.detail_title_field.text(),
+            "notes": self.detail_notes_field.toPlainText() or None,
+        }
+        # Missing and empty notes are the same to the editor
+        return {
+            name: value
+            for name, value in fields.items()
+            if (value or "") != (getattr(task, name) or "")
+        }
+
+    def save_task(self):
+        """Save the edited title and notes, at once and then in the background."""
+        task = self.current_task
+        if task is None:
+            return
+        changes = self._edited_fields(task)
+        if not changes.get("title", task.title).strip():
+            QMessageBox.warning(self, "Save Task", "The title cannot be empty.")
+            return
+        self.save_task_button.setEnabled(False)
+        self.window().task_mutations.edit(
+            task, on_finished=self._report("saved", 1), **changes
+        )
+
     def mark_task_complete(self):
-        """Mark the current task as complete and refresh the view."""
-        if not hasattr(self, 'current_task_id') or not hasattr(self, 'current_task_list_id'):
+        """Mark the selected tasks as complete, at once and then in the background."""
+        tasks = [task for task in self.selected_tasks if not task.is_completed]
+        if not tasks:
             return
 
-        try:
-            # Get parent window reference
-            parent_window = self.window()
-            
-            # Get current task
-            task = parent_window.tasks_service.tasks().get(
-                tasklist=self.current_task_list_id,
-                task=self.current_task_id
-            ).execute()
-            
-            # Update task status to completed
-            task['status'] = 'completed'
-            parent_window.tasks_service.tasks().update(
-                tasklist=self.current_task_list_id,
-                task=self.current_task_id,
-                body=task
-            ).execute()
-            
-            # Disable the complete button
-            self.complete_task_button.setEnabled(False)
-            
-            # Refresh the task list
-            parent_window.refresh_tasks()
-            
-        except Exception as e:
-            print(f"Error marking task as complete: {e}")
+        self.window().task_mutations.complete(
+            tasks, on_finished=self._report("completed", len(tasks))
+        )
 
     def delete_task(self):
-        """Delete the current task after confirmation."""
-        if not hasattr(self, 'current_task_id') or not hasattr(self, 'current_task_list_id'):
-            print("Missing task ID or task list ID")
+        """Delete the selected tasks after one confirmation."""
+        tasks = self.selected_tasks
+        if not tasks:
             return
 
-        print(f"Task ID: {self.current_task_id}")
-        print(f"Task List ID: {self.current_task_list_id}")
-
         # Show confirmation dialog
         confirm = QMessageBox()
-        confirm.setWindowTitle("Delete Task")
-        confirm.setText("Are you sure you want to delete this task?")
+        confirm.setWindowTitle("Delete Task" if len(tasks) == 1 else "Delete Tasks")
+        if len(tasks) == 1:
+            confirm.setText("Are you sure you want to delete this task?")
+        else:
+            confirm.setText(f"Are you sure you want to delete these {len(tasks)} tasks?")
         confirm.setIcon(QMessageBox.Warning)
         confirm.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
         confirm.setDefaultButton(QMessageBox.No)
         
-        if confirm.exec() == QMessageBox.Yes:
-            try:
-                # Get parent window reference
-                parent_window = self.window()
-                
-                # Delete the task
-                parent_window.tasks_service.tasks().delete(
-                    tasklist=self.current_task_list_id,
-                    task=self.current_task_id
-                ).execute()
-                
-                # Show success message
-                success = QMessageBox()
-                success.setWindowTitle("Success")
-                success.setText("Task deleted successfully!")
-                success.setIcon(QMessageBox.Information)
-                success.exec()
-                
-                # Refresh the task list
-                parent_window.refresh_tasks()
-                
-                # Clear and hide the details panel
-                self.clear_details_panel()
-                self.setVisible(False)
-                
-            except Exception as e:
-                # Show error message with detailed error info
+        if confirm.exec() != QMessageBox.Yes:
+            return
+
+        # The rows disappear at once, which also clears the selection
+        self.window().task_mutations.delete(
+            tasks, on_finished=self._report("deleted", len(tasks))
+        )
+
+    def _report(self, action, count, suffix=""):
+        """
+        Return an on_finished callback reporting the outcome of an action.
+
+        :param action: Past participle of the action, e.g. "deleted".
+        :param count: Number of tasks the action was applied to.
+        :param suffix: Text appended to the success message.
+        """
+
+        def on_finished(confirmed, errors):
+            if confirmed:
+                self.window().statusBar().showMessage(
+                    f"{_count_tasks(confirmed)} {action}{suffix}", 5000
+                )
+            if errors:
+                # Show one error message for the whole action
                 error = QMessageBox()
                 error.setWindowTitle("Error")
-                error.setText(f"Error deleting task:\n{str(e)}\nTask ID: {self.current_task_id}\nList ID: {self.current_task_list_id}")
+                error.setText(
+                    f"{len(errors)} of {_count_tasks(count)} could not be {action}:\n{errors[0]}"
+                )
                 error.setIcon(QMessageBox.Critical)
                 error.exec()
 
-    def update_task_lists_combo(self):
-        """Update the task lists combo box with available lists."""
-        try:
-            parent_window = self.window()
-            self.task_lists_combo.clear()
-            
-            # Get all task lists
-            task_lists = parent_window.tasks_service.tasklists().list().execute().get("items", [])
-            
-            # Store task list data and populate combo box
-            self.task_lists_data = {}
-            for task_list in task_lists:
-                # Skip the current task list
-                if task_list["id"] != self.current_task_list_id:
-                    self.task_lists_data[task_list["title"]] = task_list["id"]
-                    self.task_lists_combo.addItem(task_list["title"])
-            
-        except Exception as e:
-            print(f"Error updating task lists: {e}")
+        return on_finished
+
+    def show_task_lists(self, task_lists):
+        """
+        Populate the combo box with the task lists other than the current one.
+
+        Also connected to the task list directory, so the choices follow
+        lists being added, renamed or deleted. The chosen list is kept if it
+        still exists.
+
+        :param task_lists: Task list dictionaries.
+        """
+        if self.isHidden():
+            return
+        chosen = self.task_lists_combo.currentText()
+        self.task_lists_combo.clear()
+        # Store task list data and populate combo box
+        self.task_lists_data = {}
+        for task_list in task_lists:
+            # Skip the current task list
+            if task_list["id"] != self.current_task_list_id:
+                self.task_lists_data[task_list["title"]] = task_list["id"]
+                self.task_lists_combo.addItem(task_list["title"])
+        if chosen in self.task_lists_data:
+            self.task_lists_combo.setCurrentText(chosen)
+        # Enable the move controls
+        has_targets = bool(self.task_lists_data)
+        self.task_lists_combo.setEnabled(has_targets)
+        self.move_task_button.setEnabled(has_targets)
 
     def move_task(self):
-        """Move the current task to the selected task list."""
-        if not self.current_task_id or not self.current_task_list_id:
+        """Move the selected tasks to the chosen task list."""
+        tasks = self.selected_tasks
+        if not tasks:
             return
 
         selected_list_title = self.task_lists_combo.currentText()
@@ -338,37 +564,18 @@ class TaskDetailsPanel(QGroupBox):
         if not target_list_id:
             return
 
-        try:
-            parent_window = self.window()
-            #query_params = {'destinationTasklist': target_list_id}
-            # Move the task using the official move API
-            parent_window.tasks_service.tasks().move(
-                tasklist=self.current_task_list_id,
-                task=self.current_task_id,
-                destinationTasklist=target_list_id,
-            ).execute()
-            
-            # Show success message
-            success = QMessageBox()
-            success.setWindowTitle("Success")
-            success.setText(f"Task moved to '{selected_list_title}' successfully!")
-            success.setIcon(QMessageBox.Information)
-            success.exec()
-            
-            # Refresh the task list
-            parent_window.refresh_tasks()
-            
-            # Clear and hide the details panel
-            self.clear_details_panel()
-            self.setVisible(False)
-            
-        except Exception as e:
-            # Show error message
-            error = QMessageBox()
-            error.setWindowTitle("Error")
-            error.setText(f"Error moving task:\n{str(e)}")
-            error.setIcon(QMessageBox.Critical)
-            error.exec()
+        parent_window = self.window()
+        # A table showing only the source list loses the rows, which also
+        # clears the selection
+        parent_window.task_mutations.move(
+            tasks,
+            target_list_id,
+            selected_list_title,
+            keep_rows=parent_window.task_list_sidebar.shown_task_list_id is None,
+            on_finished=self._report(
+                "moved", len(tasks), suffix=f" to '{selected_list_title}'"
+            ),
+        )
 
     def clear_details_panel(self):
         """Clear all detail fields and disable relevant buttons."""
@@ -377,9 +584,45 @@ class TaskDetailsPanel(QGroupBox):
         self.detail_updated_field.clear()
         self.detail_notes_field.clear()
         self.view_task_in_browser_button.setEnabled(False)
+        self.save_task_button.setEnabled(False)
         self.complete_task_button.setEnabled(False)
         self.delete_task_button.setEnabled(False)
         self.task_lists_combo.clear()
         self.task_lists_combo.setEnabled(False)
         self.move_task_button.setEnabled(False)
         self.selected_task_link = ""
+        self.selected_tasks = []
+        self.current_task = None
+        self.current_task_id = None
+
+
+def fetch_task_enrichment(text, video_cache):
+    """
+    Look up what the details panel shows beyond the task fields.
+    Runs off the GUI thread.
+
+    :param text: Title and notes of the task.
+    :param video_cache: The YouTubeCache consulted before the YouTube API.
+    :return: Tuple of the linked YouTube video info (or None) and the first
+        other web link (or None).
+    """
+    youtube_info = None
+    video_id = extract_video_id(text)
+    if video_id:
+        youtube_info = lookup_videos([video_id], video_cache).get(video_id)
+
+    web_link = None
+    match = re.search(r"https?://[^\s]+", text)
+    if (
+        match
+        and "youtube.com" not in match.group(0)
+        and "youtu.be" not in match.group(0)
+    ):
+        web_link = match.group(0)
+
+    return youtube_info, web_link
+
+
+def _count_tasks(count):
+    """Return "1 task" or "<count> tasks"."""
+    return "1 task" if count == 1 else f"{count} tasks"
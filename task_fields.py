@@ -0,0 +1,17 @@
+"""Partial response ``fields`` masks of the Tasks API, one per consumer."""
+
+# Task fields the table, the filters and the local search use, and that the
+# cache needs to apply a delta sync. Notes stay in: the search matches them,
+# and a sync leaving them out could not tell cleared notes from unsent ones.
+VIEW_TASK_FIELDS = (
+    "id,title,notes,status,due,completed,updated,parent,position,hidden,deleted"
+)
+
+# tasks.list pages synced into the cache for the table and the filters
+VIEW_TASKS_PAGE_FIELDS = f"nextPageToken,items({VIEW_TASK_FIELDS})"
+
+# Task fields only the details panel shows, loaded when a task is selected
+DETAIL_TASK_FIELDS = "id,webViewLink,links"
+
+# Exports write every field; no mask means the full resource
+EXPORT_TASKS_PAGE_FIELDS = None
@@ -0,0 +1,128 @@
+"""The task lists of the account, fetched once and shared by every view."""
+
+import threading
+import time
+
+from google.auth.exceptions import RefreshError
+from PySide6.QtCore import QObject, Signal
+
+from task_cache import CACHE_MAX_AGE
+
+
+class TaskListDirectory(QObject):
+    """
+    The task lists of the account, for the sidebar, the "Move to" combo box
+    and the fetchers syncing every list.
+
+    The lists start as the copy of the local cache, so views can be filled
+    before the network answers. fetch() downloads every page of
+    tasklists().list() and stores the result in the cache. When the lists
+    fit in one page, later fetches send the collection etag in If-None-Match
+    and a 304 answer keeps the known lists without downloading them again.
+    Fetches within max_age seconds of the previous one are answered from
+    memory.
+
+    ``task_lists_changed`` is emitted with the new lists whenever they
+    differ from the known ones. fetch() may be called from any thread;
+    connected widgets receive the signal on the GUI thread.
+    """
+
+    # Emitted with the list of task list resources
+    task_lists_changed = Signal(list)
+
+    def __init__(
+        self, tasks_client, http_pool, task_cache, date_index=None, parent=None
+    ):
+        """
+        :param tasks_client: The TasksClient.
+        :param http_pool: The HttpPool refreshing the shared credentials.
+        :param task_cache: The TaskCache the lists are stored in.
+        :param date_index: Optional DateBucketIndex to drop deleted lists from.
+        :param parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self.tasks_client = tasks_client
+        self.http_pool = http_pool
+        self.task_cache = task_cache
+        self.date_index = date_index
+        self._lock = threading.Lock()
+        self._task_lists = task_cache.get_task_lists()
+        # Etag of the single page of lists, None when they span several pages
+        self._etag = None
+        self._fetched_at = 0
+
+    def task_lists(self):
+        """
+        Return the known task lists without any network access.
+
+        :return: List of task list resources.
+        """
+        with self._lock:
+            return list(self._task_lists)
+
+    def fetch(self, max_age=CACHE_MAX_AGE):
+        """
+        Bring the task lists up to date with the API. Blocks on the network.
+
+        :param max_age: Seconds during which the previous fetch is reused;
+            0 always asks the API.
+        :return: List of task list resources.
+        """
+        with self._lock:
+            if time.time() - self._fetched_at < max_age:
+                return list(self._task_lists)
+            etag = self._etag
+
+        started_at = time.time()
+        try:
+            pages = self._list_pages(etag)
+        except RefreshError as e:
+            print(f"Token has expired: {e}")
+            self.http_pool.ensure_valid_credentials()
+            pages = self._list_pages(etag)
+
+        if pages is None:
+            # Not modified since the previous fetch
+            with self._lock:
+                self._fetched_at = started_at
+                return list(self._task_lists)
+
+        task_lists = [
+            task_list for page in pages for task_list in page.get("items", [])
+        ]
+        self.task_cache.save_task_lists(task_lists)
+        if self.date_index is not None:
+            self.date_index.retain_lists(task_list["id"] for task_list in task_lists)
+        with self._lock:
+            changed = task_lists != self._task_lists
+            self._task_lists = task_lists
+            self._etag = pages[0].get("etag") if len(pages) == 1 else None
+            self._fetched_at = started_at
+        if changed:
+            self.task_lists_changed.emit(list(task_lists))
+        return list(task_lists)
+
+    def invalidate(self):
+        """Make the next fetch() ask the API, e.g. after creating a list."""
+        with self._lock:
+            self._fetched_at = 0
+
+    def _list_pages(self, etag):
+        """
+        Download every page of tasklists().list().
+
+        :param etag: Etag of the known single page, or None.
+        :return: List of responses, or None if the server answered 304.
+        """
+        pages = []
+        page_token = None
+        while True:
+            response = self.tasks_client.list_task_lists(
+                page_token, etag=etag if page_token is None else None
+            )
+            if response is None:
+                return None
+            pages.append(response)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return pages
@@ -1,10 +1,14 @@
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtWidgets import (
     QAbstractItemView,
     QListWidget,
-    QTableWidgetItem,
 )
 
+from search_index import IndexedTasks, index_tasks
+
+# Time the pointer rests on a task list before its tasks are prefetched
+HOVER_PREFETCH_DELAY_MS = 300
+
 
 class TaskListSidebar(QListWidget):
     """A sidebar widget for displaying multiple Google Task lists."""
@@ -20,12 +24,46 @@ class TaskListSidebar(QListWidget):
         self.setSelectionMode(QAbstractItemView.SingleSelection)
         self.itemClicked.connect(self.load_tasks_by_task_list)
         self.window = window
-
-    def fetch_tasks_by_task_list(self, item):
+        # ID of the task list the table shows, None for filters and searches
+        self.shown_task_list_id = None
+        # Key of the view the table shows, see render_tasks
+        self.shown_view = None
+        # A task list the pointer rests on is likely to be opened next
+        self.setMouseTracking(True)
+        self._hovered_task_list_id = None
+        self._hover_timer = QTimer(self)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(HOVER_PREFETCH_DELAY_MS)
+        self._hover_timer.timeout.connect(self._prefetch_hovered)
+        self.itemEntered.connect(self._start_hover)
+
+    def _start_hover(self, item):
+        """Wait for the pointer to rest on an item before prefetching it."""
+        self._hovered_task_list_id = item.data(Qt.UserRole)
+        self._hover_timer.start()
+
+    def _prefetch_hovered(self):
+        """Sync the hovered task list ahead of the other prefetched ones."""
+        self.window.task_prefetcher.bump(self._hovered_task_list_id)
+
+    def leaveEvent(self, event):
+        """Forget the hovered item once the pointer leaves the sidebar."""
+        self._hover_timer.stop()
+        super().leaveEvent(event)
+
+    def fetch_tasks_by_task_list(self, item, force=False, report=None):
         """
         Fetch tasks for the given task list item.
 
+        Tasks are read from the local cache when it is fresh, otherwise the
+        list is first synced with the Tasks API. Runs off the GUI thread when
+        called from load_tasks_by_task_list.
+
         :param item: A QListWidgetItem containing task list info.
+        :param force: If True, sync with the API even if the cache is fresh.
+        :param report: Optional callable taking IndexedTasks of the tasks
+            known so far while syncing: the cached ones, or the pages of a
+            first download.
         :return: List of tasks from the selected task list.
         """
         if isinstance(item, str):
@@ -35,70 +73,144 @@ class TaskListSidebar(QListWidget):
 
         self.current_tasklist_id = task_list_id  # Set the current task list ID
 
-        # Fetch tasks for the selected task list
-        tasks_response = (
-            self.window.tasks_service.tasks()
-            .list(tasklist=task_list_id, maxResults=1000)
-            .execute()
-        )
-        tasks = tasks_response.get("items", [])
-        # Add task list ID to each task
-        for task in tasks:
-            task["task_list_id"] = task_list_id
-            
-        return tasks
-
-    def render_tasks(self, tasks):
+        task_cache = self.window.task_cache
+        if force or not task_cache.is_fresh(task_list_id):
+            loaded = []
+            if report is not None:
+                loaded = task_cache.get_tasks(task_list_id)
+                if loaded:
+                    report(index_tasks(list(loaded)))
+
+            def page_loaded(tasks):
+                loaded.extend(tasks)
+                # The table indexes the new rows as it appends them
+                report(IndexedTasks(list(loaded), None))
+
+            self.window.task_sync.sync_task_list_by_id(
+                task_list_id,
+                force=force,
+                on_page=page_loaded if report is not None else None,
+            )
+
+        return task_cache.get_tasks(task_list_id)
+
+    def render_tasks(
+        self,
+        indexed_tasks,
+        highlights=None,
+        task_list_id=None,
+        view=None,
+        partial=False,
+    ):
+        """
+        Replace the tasks shown in the main task table.
+
+        :param indexed_tasks: IndexedTasks to display.
+        :param highlights: Optional mapping of task ID to search highlight.
+        :param task_list_id: ID of the task list when the tasks are exactly
+            the tasks of one list.
+        :param view: Optional key of what the tasks are, e.g. a task list or
+            a filter. Rendering the view already shown only updates the rows
+            that changed and keeps the selection, so a revalidated version
+            of cached tasks replaces them without flicker.
+        :param partial: True while more tasks of the view are loading, see
+            show_partial_tasks.
+        """
+        self.window.show_loading_more(len(indexed_tasks.tasks) if partial else None)
+        self.shown_task_list_id = task_list_id
+        if view is not None and view == self.shown_view:
+            changed = self.window.task_model.update_tasks(*indexed_tasks)
+            self.window.details_panel.refresh_tasks(changed)
+            return
+        self.shown_view = view
+        self.window.task_model.set_tasks(*indexed_tasks, highlights=highlights)
+        self.window.task_table.clearSelection()  # Clear table selection to hide details pane when none is selected
+
+    def load_tasks_by_task_list(self, item, force=False):
         """
-        Clear and reload the main task table with the given tasks.
+        Load tasks for the given item in the background and render them.
+
+        A click emits both itemClicked and currentItemChanged, which both
+        load the list; the second request joins the pending one.
 
-        :param tasks: List of task dictionaries to display.
+        :param item: A QListWidgetItem containing task list info.
+        :param force: If True, sync with the API even if the cache is fresh.
         """
-        self.window.task_table.setRowCount(0)
-
-        for task in tasks:
-            row_position = self.window.task_table.rowCount()
-            self.window.task_table.insertRow(row_position)
-
-            # Title column (index 0)
-            title_item = QTableWidgetItem(task["title"] or "")
-            self.window.task_table.setItem(row_position, 0, title_item)
-
-            # Store all task data in user roles
-            title_item.setData(Qt.UserRole, task["id"])
-            title_item.setData(Qt.UserRole + 1, task.get("task_list_id"))
-            title_item.setData(Qt.UserRole + 2, task.get("updated", ""))
-            title_item.setData(Qt.UserRole + 3, task.get("notes", ""))
-            title_item.setData(Qt.UserRole + 4, task.get("webViewLink", ""))
-            title_item.setData(Qt.UserRole + 5, task.get("due", ""))
-            title_item.setData(Qt.UserRole + 6, task.get("completed", ""))
-            title_item.setData(Qt.UserRole + 7, task.get("status", ""))
-
-            # Display date column (index 1)
-            display_date = ""
-            if task.get("status") == "completed" and "completed" in task:
-                display_date = task["completed"].split("T")[0]  # Just the date part
-            elif "updated" in task:
-                display_date = task["updated"].split("T")[0]  # Just the date part
-
-            self.window.task_table.setItem(
-                row_position, 1, QTableWidgetItem(display_date)
+        if isinstance(item, str):
+            task_list_id = item
+        else:
+            task_list_id = item.data(Qt.UserRole)
+        self.current_tasklist_id = task_list_id
+        self.window.task_prefetcher.touch(task_list_id)
+
+        view = ("task_list", task_list_id)
+        # Partial results would drop rows of the tasks already shown
+        if view == self.shown_view:
+            self.window.runner.run(
+                "tasks",
+                lambda: index_tasks(
+                    self.fetch_tasks_by_task_list(task_list_id, force=force)
+                ),
+                on_result=lambda indexed_tasks: self.show_loaded_tasks(
+                    task_list_id, indexed_tasks
+                ),
+                on_error=self.window.show_load_error,
+                key=(view, force),
             )
+            return
+        self.window.runner.run(
+            "tasks",
+            lambda report: index_tasks(
+                self.fetch_tasks_by_task_list(task_list_id, force=force, report=report)
+            ),
+            on_result=lambda indexed_tasks: self.show_loaded_tasks(
+                task_list_id, indexed_tasks
+            ),
+            on_error=self.window.show_load_error,
+            key=(view, force),
+            on_progress=lambda indexed_tasks: self.show_partial_tasks(
+                indexed_tasks, task_list_id=task_list_id, view=view
+            ),
+        )
 
-        self.window.task_table.clearSelection()  # Clear table selection to hide details pane when none is selected
+    def show_partial_tasks(self, indexed_tasks, task_list_id=None, view=None):
+        """
+        Render the tasks of a view known so far, while the rest loads.
 
-    def load_tasks_by_task_list(self, item):
+        The first call replaces the table contents; later ones, for the same
+        view, append the new rows and keep the selection and scroll
+        position. A "loading more" indicator stays until the full view is
+        rendered.
+
+        :param indexed_tasks: IndexedTasks including those already shown;
+            without a search index, the table indexes the new rows itself.
+        :param task_list_id: See render_tasks.
+        :param view: See render_tasks.
         """
-        Load tasks for the given item and render them.
+        self.render_tasks(
+            indexed_tasks,
+            task_list_id=task_list_id,
+            view=view,
+            partial=True,
+        )
 
-        :param item: A QListWidgetItem containing task list info.
+    def show_loaded_tasks(self, task_list_id, indexed_tasks):
         """
-        tasks = self.fetch_tasks_by_task_list(item)
-        self.render_tasks(tasks)
+        Render the tasks of a task list once they are loaded.
+
+        :param task_list_id: ID of the task list.
+        :param indexed_tasks: IndexedTasks to display.
+        """
+        self.render_tasks(
+            indexed_tasks, task_list_id=task_list_id, view=("task_list", task_list_id)
+        )
+        self.window.prefetch_youtube_videos(indexed_tasks.tasks)
         self.window.refresh_button.setEnabled(True)
+        # The sync may have moved tasks between date filters
+        self.window.update_filter_counts()
 
     def refresh_tasks(self):
         """Refresh tasks by reloading for the currently selected item."""
         current_item = self.currentItem()
         if current_item:
-            self.load_tasks_by_task_list(current_item)
+            self.load_tasks_by_task_list(current_item, force=True)
@@ -0,0 +1,288 @@
+"""Task mutations applied locally at once and confirmed by the API afterwards."""
+
+import time
+
+from PySide6.QtCore import QObject, Signal
+
+from task_batch import TaskOperation
+
+
+class TaskMutations(QObject):
+    """
+    Optimistic task mutations, on one task or hundreds at once.
+
+    A mutation is first applied to the task cache, the date index and the
+    rows of the task table, then queued in the MutationOutbox, which sends
+    it as a minimal PATCH, DELETE or move request in the background, in
+    batches, and retries it until the network allows. The task resource
+    the API answers with replaces the local guess, unless newer changes of
+    the task are still queued. If the API rejects the mutation, the
+    previous version of the task is put back everywhere, and its list is
+    synced again on next display. A removed row is only put back while the
+    table still shows the view it was removed from. Nothing is reloaded, so
+    a mutation costs one small request and one table row update per task.
+
+    Every method takes an ``on_finished`` callback, called once every task
+    of the action was confirmed or rejected, with the number of confirmed
+    tasks and the list of errors of the rejected ones.
+
+    ``tasks_changed`` is emitted with the task IDs every time the local
+    state of tasks changes, including on confirmation and rollback. All
+    methods are called from the GUI thread.
+    """
+
+    tasks_changed = Signal(list)
+
+    def __init__(
+        self, outbox, task_cache, date_index, task_model, sidebar, parent=None
+    ):
+        """
+        :param outbox: The MutationOutbox sending the mutations.
+        :param task_cache: The TaskCache to update.
+        :param date_index: The DateBucketIndex to update.
+        :param task_model: The TaskTableModel displaying the tasks.
+        :param sidebar: The TaskListSidebar telling which view the table shows.
+        :param parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self.outbox = outbox
+        self.task_cache = task_cache
+        self.date_index = date_index
+        self.task_model = task_model
+        self.sidebar = sidebar
+        outbox.operations_done.connect(self._confirm)
+        outbox.operations_failed.connect(self._forget)
+
+    def complete(self, tasks, on_finished=None):
+        """
+        Mark tasks as completed; those already completed are skipped.
+
+        :param tasks: The Task records as displayed.
+        :param on_finished: Optional callback, see the class docstring.
+        """
+        tasks = [task for task in tasks if not task.is_completed]
+        completed_at = _now_ms()
+        self._replace(
+            [task.replace(status="completed", completed=completed_at) for task in tasks]
+        )
+        tally = _Tally(len(tasks), on_finished)
+        for task in tasks:
+            self._send(
+                TaskOperation("complete", task.task_list_id, task.id),
+                tally,
+                restore=lambda task=task: self._replace([task]),
+            )
+
+    def edit(self, task, on_finished=None, **changes):
+        """
+        Change the title or notes of a task.
+
+        :param task: The Task record as displayed.
+        :param on_finished: Optional callback, see the class docstring.
+        :param changes: New ``title`` and/or ``notes``.
+        """
+        body = {
+            name: value
+            for name, value in changes.items()
+            if value != getattr(task, name)
+        }
+        if not body:
+            return
+        self._replace([task.replace(updated=_now_ms(), **body)])
+        self._send(
+            TaskOperation("edit", task.task_list_id, task.id, body=body),
+            _Tally(1, on_finished),
+            restore=lambda: self._replace([task]),
+        )
+
+    def delete(self, tasks, on_finished=None):
+        """
+        Delete tasks.
+
+        :param tasks: The Task records as displayed.
+        :param on_finished: Optional callback, see the class docstring.
+        """
+        view = self.sidebar.shown_view
+        rows = self._remove(tasks)
+        tally = _Tally(len(tasks), on_finished)
+        for task in tasks:
+            self._send(
+                TaskOperation("delete", task.task_list_id, task.id),
+                tally,
+                restore=lambda task=task: self._restore(task, rows.get(task.id), view),
+            )
+
+    def move(
+        self,
+        tasks,
+        destination_id,
+        destination_title,
+        keep_rows=True,
+        on_finished=None,
+    ):
+        """
+        Move tasks to another task list; those already in it are skipped.
+
+        :param tasks: The Task records as displayed.
+        :param destination_id: ID of the destination task list.
+        :param destination_title: Title of the destination task list.
+        :param keep_rows: Whether the table keeps showing the tasks, e.g.
+            False when it only shows their source list.
+        :param on_finished: Optional callback, see the class docstring.
+        """
+        tasks = [task for task in tasks if task.task_list_id != destination_id]
+        moved = [
+            task.replace(
+                task_list_id=destination_id,
+                tasklist_name=destination_title,
+                parent=None,
+            )
+            for task in tasks
+        ]
+        view = self.sidebar.shown_view
+        if keep_rows:
+            self._replace(moved)
+            rows = {}
+        else:
+            rows = self.task_model.remove_tasks(task.id for task in tasks)
+            self._store(moved)
+            self.tasks_changed.emit([task.id for task in tasks])
+        tally = _Tally(len(tasks), on_finished)
+        for task in tasks:
+            if keep_rows:
+                restore = lambda task=task: self._replace([task])
+            else:
+                restore = lambda task=task: self._restore(
+                    task, rows.get(task.id), view
+                )
+            self._send(
+                TaskOperation("move", task.task_list_id, task.id, destination_id),
+                tally,
+                restore=restore,
+            )
+
+    def _send(self, operation, tally, restore):
+        """
+        Queue a mutation already applied locally.
+
+        :param operation: The TaskOperation to send.
+        :param tally: The _Tally of the action it belongs to.
+        :param restore: Callable undoing the local mutation.
+        """
+
+        def rejected(error):
+            print(f"Error sending task {operation.action}: {error}")
+            restore()
+            tally.failed(error)
+
+        self.outbox.enqueue(operation, on_done=tally.done, on_error=rejected)
+
+    def _confirm(self, outcomes):
+        """Replace the local versions of tasks with the API's answers."""
+        responses_by_list = {}
+        for _, operation, response in outcomes:
+            if not response or self.outbox.has_pending(operation.task_id):
+                continue
+            task_list_id = operation.destination_task_list_id or operation.task_list_id
+            responses_by_list.setdefault(task_list_id, []).append(response)
+        if not responses_by_list:
+            return
+        # The answers carry the server side timestamps, positions and etags
+        for task_list_id, responses in responses_by_list.items():
+            self.task_cache.merge_tasks(task_list_id, responses)
+        tasks = self.task_cache.get_tasks_by_id(
+            response["id"]
+            for responses in responses_by_list.values()
+            for response in responses
+        )
+        self._replace(tasks, store=False)
+
+    def _forget(self, failures):
+        """Make the lists touched by rejected mutations sync again."""
+        for _, operation, _ in failures:
+            self.task_cache.invalidate(operation.task_list_id)
+            if operation.destination_task_list_id:
+                self.task_cache.invalidate(operation.destination_task_list_id)
+
+    def _replace(self, tasks, store=True):
+        """
+        Show new versions of tasks everywhere.
+
+        :param store: False if the cache already holds them.
+        """
+        if not tasks:
+            return
+        if store:
+            self.task_cache.put_tasks(tasks)
+        for task in tasks:
+            self.date_index.add(task)
+        self.task_model.replace_tasks(tasks)
+        self.tasks_changed.emit([task.id for task in tasks])
+
+    def _store(self, tasks):
+        """Write new versions of tasks to the cache and the date index."""
+        self.task_cache.put_tasks(tasks)
+        for task in tasks:
+            self.date_index.add(task)
+
+    def _remove(self, tasks):
+        """Drop tasks everywhere, returning the table rows they had by ID."""
+        task_ids = [task.id for task in tasks]
+        self.task_cache.delete_tasks(task_ids)
+        for task_id in task_ids:
+            self.date_index.remove(task_id)
+        rows = self.task_model.remove_tasks(task_ids)
+        self.tasks_changed.emit(task_ids)
+        return rows
+
+    def _restore(self, task, row, view):
+        """
+        Undo the removal of a task.
+
+        :param task: The Task record as it was.
+        :param row: The table row it had, or None.
+        :param view: Key of the view the table showed when it was removed;
+            searches have none, so their rows are not put back.
+        """
+        self._store([task])
+        if row is not None and view is not None and view == self.sidebar.shown_view:
+            self.task_model.insert_task(row, task)
+        self.tasks_changed.emit([task.id])
+
+
+class _Tally:
+    """Counts the outcomes of the operations of one action."""
+
+    def __init__(self, total, on_finished):
+        """
+        :param total: Number of operations of the action.
+        :param on_finished: Callback with the number of confirmed operations
+            and the errors of the rejected ones, or None.
+        """
+        self.total = total
+        self.on_finished = on_finished
+        self.confirmed = 0
+        self.errors = []
+        if total == 0:
+            self._check()
+
+    def done(self, response=None):
+        """Count a confirmed operation."""
+        self.confirmed += 1
+        self._check()
+
+    def failed(self, error):
+        """Count a rejected operation."""
+        self.errors.append(error)
+        self._check()
+
+    def _check(self):
+        """Report once every operation has an outcome."""
+        if self.confirmed + len(self.errors) == self.total:
+            if self.on_finished is not None:
+                self.on_finished(self.confirmed, self.errors)
+
+
+def _now_ms():
+    """Return the current time in epoch milliseconds."""
+    return int(time.time() * 1000)
@@ -0,0 +1,147 @@
+"""Background warming of the task cache, most recently used lists first."""
+
+from PySide6.QtCore import QObject, QTimer
+
+from workers import PREFETCH_PRIORITY
+
+# Most task lists synced at the same time by the prefetcher
+PREFETCH_CONCURRENCY = 2
+
+# Delay before trying again while the task table is loading
+PREFETCH_RETRY_MS = 500
+
+# Number of most recently used task lists remembered across sessions
+RECENT_TASK_LISTS = 50
+
+
+class TaskListPrefetcher(QObject):
+    """
+    Syncs the task lists the user has not opened yet into the task cache.
+
+    Lists are queued most recently used first, then in sidebar order;
+    bump() moves one to the front, e.g. while the pointer rests on it. A
+    list whose cached copy is still fresh is skipped, and one whose
+    ``updated`` timestamp and etag did not move costs no request, see
+    TaskSync. Opening a list from the sidebar then reads the cache instead
+    of waiting for the API.
+
+    The prefetcher yields to what the user asked for: at most
+    PREFETCH_CONCURRENCY lists are synced at once, their jobs start after
+    any other waiting job, and none starts while the task table is loading.
+    All methods are called from the GUI thread.
+    """
+
+    def __init__(
+        self, runner, task_sync, task_cache, directory, recent=(), parent=None
+    ):
+        """
+        :param runner: The TaskRunner the syncs run on.
+        :param task_sync: The TaskSync filling the cache.
+        :param task_cache: The TaskCache telling which lists are fresh.
+        :param directory: The TaskListDirectory of the task list resources.
+        :param recent: IDs of the task lists used last, most recent first,
+            e.g. as returned by recent() in the previous session.
+        :param parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self.runner = runner
+        self.task_sync = task_sync
+        self.task_cache = task_cache
+        self.directory = directory
+        self._recent = list(recent)[:RECENT_TASK_LISTS]
+        # IDs of the lists waiting to be synced, next first
+        self._queue = []
+        # IDs of the lists being synced
+        self._in_flight = set()
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.setInterval(PREFETCH_RETRY_MS)
+        self._retry_timer.timeout.connect(self._drain)
+
+    def prefetch(self, task_lists):
+        """
+        Queue every task list, most recently used first.
+
+        :param task_lists: Task list resources, in sidebar order.
+        """
+        ids = [task_list["id"] for task_list in task_lists]
+        rank = {task_list_id: index for index, task_list_id in enumerate(self._recent)}
+        self._queue = sorted(
+            (
+                task_list_id
+                for task_list_id in ids
+                if task_list_id not in self._in_flight
+            ),
+            key=lambda task_list_id: rank.get(task_list_id, len(rank)),
+        )
+        self._drain()
+
+    def bump(self, task_list_id):
+        """
+        Sync a task list before the other queued ones.
+
+        :param task_list_id: ID of the task list.
+        """
+        if task_list_id in self._in_flight:
+            return
+        if task_list_id in self._queue:
+            self._queue.remove(task_list_id)
+        self._queue.insert(0, task_list_id)
+        self._drain()
+
+    def touch(self, task_list_id):
+        """
+        Record that a task list was opened, which also loads it.
+
+        :param task_list_id: ID of the task list.
+        """
+        if task_list_id in self._recent:
+            self._recent.remove(task_list_id)
+        self._recent.insert(0, task_list_id)
+        del self._recent[RECENT_TASK_LISTS:]
+        if task_list_id in self._queue:
+            self._queue.remove(task_list_id)
+
+    def recent(self):
+        """Return the IDs of the task lists used last, most recent first."""
+        return list(self._recent)
+
+    def _drain(self):
+        """Start syncing queued lists, up to PREFETCH_CONCURRENCY at a time."""
+        if self.runner.is_busy("tasks"):
+            if self._queue:
+                self._retry_timer.start()
+            return
+        while self._queue and len(self._in_flight) < PREFETCH_CONCURRENCY:
+            task_list_id = self._queue.pop(0)
+            self._in_flight.add(task_list_id)
+            self.runner.run(
+                f"prefetch:{task_list_id}",
+                lambda task_list_id=task_list_id: self._warm(task_list_id),
+                on_result=lambda _, task_list_id=task_list_id: self._done(task_list_id),
+                on_error=lambda e, task_list_id=task_list_id: self._failed(
+                    task_list_id, e
+                ),
+                priority=PREFETCH_PRIORITY,
+            )
+
+    def _warm(self, task_list_id):
+        """Sync a task list unless its cache is fresh. Runs off the GUI thread."""
+        if self.task_cache.is_fresh(task_list_id):
+            return
+        # The directory may be minutes old; sync_task_list_by_id() fetches
+        # the list resource the decision to skip the download is made on
+        if any(
+            task_list["id"] == task_list_id for task_list in self.directory.task_lists()
+        ):
+            self.task_sync.sync_task_list_by_id(task_list_id)
+
+    def _done(self, task_list_id):
+        """Move on to the next queued list."""
+        self._in_flight.discard(task_list_id)
+        self._drain()
+
+    def _failed(self, task_list_id, error):
+        """Report a failed sync and move on; the list syncs again when opened."""
+        print(f"Error prefetching task list {task_list_id}: {error}")
+        self._done(task_list_id)
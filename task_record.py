@@ -0,0 +1,167 @@
+"""Compact in-memory representation of a Google Task."""
+
+import sys
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MILLISECOND = timedelta(milliseconds=1)
+
+# Length of a day in the millisecond timestamps used by Task
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def parse_timestamp(value):
+    """
+    Parse an RFC 3339 timestamp from the Tasks API.
+
+    :param value: A string such as ``2024-05-01T00:00:00.000Z``, or None.
+    :return: Milliseconds since the epoch, or None for a missing value.
+    """
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return (moment - _EPOCH) // _ONE_MILLISECOND
+
+
+def format_timestamp(value):
+    """
+    Format epoch milliseconds the way the Tasks API does.
+
+    :param value: Milliseconds since the epoch, or None.
+    :return: An RFC 3339 UTC string, or "" for a missing value.
+    """
+    if value is None:
+        return ""
+    moment = _EPOCH + value * _ONE_MILLISECOND
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value % 1000:03d}Z"
+
+
+def format_date(value):
+    """
+    Format the UTC date part of epoch milliseconds.
+
+    :param value: Milliseconds since the epoch, or None.
+    :return: A ``YYYY-MM-DD`` string, or "" for a missing value.
+    """
+    if value is None:
+        return ""
+    return (_EPOCH + value * _ONE_MILLISECOND).strftime("%Y-%m-%d")
+
+
+def intern_or_none(value):
+    """Intern a string so equal values share one object; None passes through."""
+    return None if value is None else sys.intern(value)
+
+
+class Task:
+    """
+    A task as used by every layer of the application.
+
+    Timestamps are epoch milliseconds (or None), and the task list ID, task
+    list name and status are interned, since thousands of tasks share a
+    handful of distinct values.
+    """
+
+    __slots__ = (
+        "id",
+        "task_list_id",
+        "tasklist_name",
+        "title",
+        "notes",
+        "status",
+        "due",
+        "completed",
+        "updated",
+        "parent",
+        "position",
+        "hidden",
+        "web_view_link",
+    )
+
+    def __init__(
+        self,
+        id,
+        task_list_id,
+        title="",
+        notes=None,
+        status="needsAction",
+        due=None,
+        completed=None,
+        updated=None,
+        parent=None,
+        position=None,
+        hidden=False,
+        web_view_link=None,
+        tasklist_name=None,
+    ):
+        """
+        :param id: The task ID.
+        :param task_list_id: ID of the task list holding the task.
+        :param title: The task title.
+        :param notes: The task notes, if any.
+        :param status: ``needsAction`` or ``completed``.
+        :param due: Due date in epoch milliseconds, if any.
+        :param completed: Completion time in epoch milliseconds, if any.
+        :param updated: Last modification time in epoch milliseconds.
+        :param parent: ID of the parent task, if any.
+        :param position: Position string among the siblings.
+        :param hidden: Whether the task was cleared from the list.
+        :param web_view_link: URL of the task in the Google Tasks web UI.
+        :param tasklist_name: Title of the task list holding the task.
+        """
+        self.id = id
+        self.task_list_id = intern_or_none(task_list_id)
+        self.tasklist_name = intern_or_none(tasklist_name)
+        self.title = title or ""
+        self.notes = notes
+        self.status = intern_or_none(status)
+        self.due = due
+        self.completed = completed
+        self.updated = updated
+        self.parent = parent
+        self.position = position
+        self.hidden = bool(hidden)
+        self.web_view_link = web_view_link
+
+    @classmethod
+    def from_api(cls, resource, task_list_id, tasklist_name=None):
+        """
+        Build a Task from a Tasks API resource.
+
+        :param resource: The task dictionary returned by the API.
+        :param task_list_id: ID of the task list holding the task.
+        :param tasklist_name: Title of that task list, if known.
+        """
+        return cls(
+            resource["id"],
+            task_list_id,
+            title=resource.get("title"),
+            notes=resource.get("notes"),
+            status=resource.get("status"),
+            due=parse_timestamp(resource.get("due")),
+            completed=parse_timestamp(resource.get("completed")),
+            updated=parse_timestamp(resource.get("updated")),
+            parent=resource.get("parent"),
+            position=resource.get("position"),
+            hidden=resource.get("hidden", False),
+            web_view_link=resource.get("webViewLink"),
+            tasklist_name=tasklist_name,
+        )
+
+    def replace(self, **changes):
+        """
+        Return a copy of the task with some attributes changed.
+
+        :param changes: New values by attribute name.
+        """
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return Task(**values)
+
+    @property
+    def is_completed(self):
+        """Whether the task is marked as completed."""
+        return self.status == "completed"
+
+    def __repr__(self):
+        return f"Task(id={self.id!r}, title={self.title!r}, status={self.status!r})"
@@ -0,0 +1,227 @@
+"""Incremental synchronisation of Google Tasks into the local task cache."""
+
+import time
+
+from task_fields import VIEW_TASKS_PAGE_FIELDS
+from task_record import Task, format_timestamp
+from workers import SingleFlight
+
+# Seconds subtracted from the last sync time when asking for changes, to
+# absorb clock differences between this machine and Google's servers.
+# Changes seen twice are merged idempotently.
+SYNC_CLOCK_SKEW = 60
+
+
+class TaskSync:
+    """
+    Keeps the task cache in step with the Tasks API.
+
+    The first sync of a list downloads it in full. Later syncs only ask for
+    tasks updated since the previous one (deleted and hidden tasks
+    included) and merge them into the cache. Lists whose ``updated``
+    timestamp and etag have not moved since the last sync are skipped.
+    The queries of several lists are sent together through a TaskBatcher.
+
+    The pages of a first download can be shown before the list is complete:
+    they are handed to an ``on_page`` callback as Task records, and added to
+    the date index, as they arrive. A list being synced is not synced again
+    at the same time: the second call waits for the first one and gets its
+    pages too.
+    """
+
+    def __init__(self, tasks_client, task_cache, batcher, date_index=None):
+        """
+        :param tasks_client: The TasksClient.
+        :param task_cache: The TaskCache to keep up to date.
+        :param batcher: The TaskBatcher used for multi-list queries.
+        :param date_index: Optional DateBucketIndex to refresh after each
+            change of the cache.
+        """
+        self.tasks_client = tasks_client
+        self.task_cache = task_cache
+        self.batcher = batcher
+        self.date_index = date_index
+        # Syncs of single lists in progress, by task list ID and force flag,
+        # so a forced sync never joins one that may skip the request
+        self._flights = SingleFlight()
+
+    def sync_task_lists(self, task_lists, fetched_at, force=False, on_page=None):
+        """
+        Sync several task lists at once, reporting failures without stopping.
+
+        The change queries of every list that moved are batched together.
+
+        :param task_lists: Task list resources as returned by the API.
+        :param fetched_at: Epoch time the resources were requested at, see
+            sync_task_list().
+        :param force: If True, ask for changes even for unchanged lists.
+        :param on_page: Optional callable taking the visible Task records of
+            each page of the lists downloaded for the first time.
+        """
+        started_at = time.time()
+        task_lists_by_id = {}
+        states = {}
+        queries = {}
+        for task_list in task_lists:
+            state = self.task_cache.get_sync_state(task_list["id"])
+            if state is not None and not force and self._is_unchanged(task_list, state):
+                self._record_sync(task_list, fetched_at)
+                continue
+            task_lists_by_id[task_list["id"]] = task_list
+            states[task_list["id"]] = state
+            queries[task_list["id"]] = self._changes_query(state)
+
+        def page_loaded(task_list_id, tasks):
+            if states[task_list_id] is None:
+                tasks = self._load_page(task_lists_by_id[task_list_id], tasks)
+                if on_page is not None:
+                    on_page(tasks)
+
+        tasks_by_list, errors_by_list = self.batcher.list_tasks(queries, page_loaded)
+        for task_list_id, tasks in tasks_by_list.items():
+            self._store_tasks(task_list_id, tasks, states[task_list_id])
+            self._record_sync(task_lists_by_id[task_list_id], started_at)
+        for task_list_id, error in errors_by_list.items():
+            title = task_lists_by_id[task_list_id]["title"]
+            print(f"Error syncing tasks for list {title}: {error}")
+
+    def sync_task_list_by_id(self, task_list_id, force=False, on_page=None):
+        """
+        Fetch the current state of a task list, then sync it.
+
+        :param task_list_id: ID of the task list.
+        :param force: If True, ask for changes even if the list is unchanged.
+        :param on_page: See sync_task_list().
+        :return: True if the cache was updated.
+        """
+        return self._flights.run(
+            (task_list_id, force),
+            lambda report: self._sync_task_list_by_id(task_list_id, force, report),
+            on_page,
+        )
+
+    def sync_task_list(self, task_list, fetched_at, force=False, on_page=None):
+        """
+        Bring the cached copy of a task list up to date.
+
+        A list that did not move is not downloaded, and the next delta sync
+        starts from fetched_at: changes made after an older copy of the
+        resource was fetched would otherwise never be asked for.
+
+        :param task_list: The task list resource as returned by the API.
+        :param fetched_at: Epoch time the resource was requested at.
+        :param force: If True, ask for changes even if the list is unchanged.
+        :param on_page: Optional callable taking the visible Task records of
+            each page, if the list is downloaded for the first time.
+        :return: True if the cache was updated.
+        """
+        return self._flights.run(
+            (task_list["id"], force),
+            lambda report: self._sync_task_list(task_list, fetched_at, force, report),
+            on_page,
+        )
+
+    def _sync_task_list_by_id(self, task_list_id, force, report):
+        """Fetch a task list resource, then sync the list."""
+        fetched_at = time.time()
+        task_list = self.tasks_client.get_task_list(task_list_id)
+        return self._sync_task_list(task_list, fetched_at, force, report)
+
+    def _sync_task_list(self, task_list, fetched_at, force, report):
+        """Sync a task list, reporting the pages of a first download."""
+        task_list_id = task_list["id"]
+        state = self.task_cache.get_sync_state(task_list_id)
+        if state is not None and not force and self._is_unchanged(task_list, state):
+            # Nothing moved up to the fetch, record that we checked until then
+            self._record_sync(task_list, fetched_at)
+            return False
+
+        def page_loaded(tasks):
+            report(self._load_page(task_list, tasks))
+
+        started_at = time.time()
+        tasks = self._list_tasks(
+            task_list_id,
+            on_page=page_loaded if state is None else None,
+            **self._changes_query(state),
+        )
+        self._store_tasks(task_list_id, tasks, state)
+        self._record_sync(task_list, started_at)
+        return True
+
+    def _changes_query(self, state):
+        """
+        Build the extra tasks().list() parameters for a sync.
+
+        :param state: The recorded sync state, or None for a first sync.
+        :return: Parameters asking for every task or only for changes.
+        """
+        if state is None:
+            return {}
+        updated_min = format_timestamp(
+            int((state["synced_at"] - SYNC_CLOCK_SKEW) * 1000)
+        )
+        return {"updatedMin": updated_min, "showDeleted": True}
+
+    def _store_tasks(self, task_list_id, tasks, state):
+        """Save a full download, or merge the changes of a delta sync."""
+        if state is None:
+            self.task_cache.save_tasks(task_list_id, tasks)
+        else:
+            self.task_cache.merge_tasks(task_list_id, tasks)
+        if self.date_index is not None:
+            self.date_index.reload_list(task_list_id)
+
+    def _load_page(self, task_list, tasks):
+        """
+        Index a page of a first download.
+
+        :return: The visible tasks of the page, as Task records.
+        """
+        records = [
+            Task.from_api(task, task_list["id"], task_list.get("title"))
+            for task in tasks
+            if not task.get("deleted")
+        ]
+        if self.date_index is not None:
+            for record in records:
+                self.date_index.add(record)
+        return [record for record in records if not record.hidden]
+
+    def _is_unchanged(self, task_list, state):
+        """Tell whether a task list has not moved since the recorded sync."""
+        if state["synced_updated"] is None:
+            return False
+        if task_list.get("updated") != state["synced_updated"]:
+            return False
+        return not task_list.get("etag") or task_list["etag"] == state["synced_etag"]
+
+    def _record_sync(self, task_list, synced_at):
+        """Store the sync bookkeeping of a task list."""
+        self.task_cache.set_sync_state(
+            task_list["id"], synced_at, task_list.get("etag"), task_list.get("updated")
+        )
+
+    def _list_tasks(self, task_list_id, on_page=None, **params):
+        """
+        Download every page of a tasks().list() query, hidden tasks included.
+
+        :param task_list_id: ID of the task list.
+        :param on_page: Optional callable taking the tasks of each page.
+        :param params: Extra query parameters such as ``updatedMin``.
+        :return: List of task resources, projected on VIEW_TASKS_PAGE_FIELDS.
+        """
+        params.setdefault("fields", VIEW_TASKS_PAGE_FIELDS)
+        tasks = []
+        page_token = None
+        while True:
+            response = self.tasks_client.list_tasks(
+                task_list_id, page_token, showHidden=True, **params
+            )
+            tasks.extend(response.get("items", []))
+            if on_page is not None:
+                on_page(response.get("items", []))
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        return tasks
@@ -0,0 +1,356 @@
+"""Model/view classes backing the main task table."""
+
+import html
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PySide6.QtGui import QAbstractTextDocumentLayout, QPalette, QTextDocument
+from PySide6.QtWidgets import QApplication, QStyle, QStyledItemDelegate
+
+from search_index import SearchIndex
+from task_cache import HIGHLIGHT_END, HIGHLIGHT_START
+from task_record import Task, format_date
+
+# Column indexes of the task table
+TITLE_COLUMN = 0
+DATE_COLUMN = 1
+
+HEADERS = ["Title", "Last Updated"]
+
+# Role of the search highlight of a title cell, see SearchHit.highlight
+HIGHLIGHT_ROLE = Qt.UserRole + 1
+
+
+def display_date(task):
+    """
+    Return the date shown in the table for a task.
+
+    Completed tasks show their completion date, other tasks their last
+    update date, without the time part.
+
+    :param task: A Task record.
+    """
+    if task.is_completed and task.completed is not None:
+        return format_date(task.completed)
+    return format_date(task.updated)
+
+
+class TaskTableModel(QAbstractTableModel):
+    """
+    Table model over a list of Task records.
+
+    Cell values are computed on demand in data(), so nothing is stored per
+    cell and replacing the whole list is a single model reset. The model
+    keeps a SearchIndex of its tasks in step with the rows.
+    """
+
+    def __init__(self, parent=None):
+        """
+        :param parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self._tasks = []
+        self.search_index = SearchIndex()
+        # Task ID -> search highlight shown instead of the title
+        self._highlights = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        """Return the number of tasks, or 0 for child indexes."""
+        return 0 if parent.isValid() else len(self._tasks)
+
+    def columnCount(self, parent=QModelIndex()):
+        """Return the number of columns, or 0 for child indexes."""
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Return the title, its search highlight or the display date of a task."""
+        if not index.isValid():
+            return None
+        task = self._tasks[index.row()]
+        if role == HIGHLIGHT_ROLE:
+            if index.column() == TITLE_COLUMN:
+                return self._highlights.get(task.id)
+            return None
+        if role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        if index.column() == TITLE_COLUMN:
+            return task.title
+        if role == Qt.DisplayRole:
+            return display_date(task)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """Return the column titles."""
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def set_tasks(self, tasks, search_index=None, highlights=None):
+        """
+        Replace every task of the model in one reset.
+
+        :param tasks: List of Task records to display.
+        :param search_index: SearchIndex already built over ``tasks``;
+            the model builds one when it is not given.
+        :param highlights: Optional mapping of task ID to the search
+            highlight shown instead of its title.
+        """
+        self.beginResetModel()
+        self._tasks = list(tasks)
+        self._highlights = dict(highlights or {})
+        if search_index is None:
+            search_index = SearchIndex()
+            search_index.rebuild(self._tasks)
+        self.search_index = search_index
+        self.endResetModel()
+
+    def update_tasks(self, tasks, search_index=None):
+        """
+        Replace every task of the model with row level changes only.
+
+        Meant for a fresher version of the tasks displayed: the rows of the
+        tasks still there stay in place, so the selection and the scroll
+        position are kept. Falls back to set_tasks() when the order of
+        those tasks changed or none of them is left. Tasks that only extend
+        the displayed ones, e.g. the next page of a download, are appended.
+
+        :param tasks: List of Task records to display.
+        :param search_index: SearchIndex already built over ``tasks``.
+        :return: IDs of the tasks still displayed whose record changed.
+        """
+        tasks = list(tasks)
+        count = len(self._tasks)
+        if len(tasks) > count and all(
+            new is old for new, old in zip(tasks, self._tasks)
+        ):
+            self.append_tasks(tasks[count:])
+            return []
+        new_ids = {task.id for task in tasks}
+        old_ids = {task.id for task in self._tasks}
+        kept = [task.id for task in self._tasks if task.id in new_ids]
+        if not kept or kept != [task.id for task in tasks if task.id in old_ids]:
+            self.set_tasks(tasks, search_index)
+            return []
+
+        self.remove_tasks(old_ids - new_ids)
+        for row, task in enumerate(tasks):
+            if task.id not in old_ids:
+                self.insert_task(row, task)
+        changed = [
+            new
+            for old, new in zip(self._tasks, tasks)
+            if any(
+                getattr(old, name) != getattr(new, name) for name in Task.__slots__
+            )
+        ]
+        self.replace_tasks(changed)
+        if search_index is not None:
+            self.search_index = search_index
+        return [task.id for task in changed]
+
+    def append_tasks(self, tasks):
+        """
+        Append tasks at the end of the model as one row range.
+
+        :param tasks: List of Task records to add.
+        """
+        if not tasks:
+            return
+        first = len(self._tasks)
+        self.beginInsertRows(QModelIndex(), first, first + len(tasks) - 1)
+        self._tasks.extend(tasks)
+        for task in tasks:
+            self.search_index.add(task)
+        self.endInsertRows()
+
+    def rows_of(self, task_ids):
+        """
+        Return the model rows of some tasks.
+
+        :param task_ids: Iterable of task IDs.
+        :return: Dictionary of task ID to row, for the displayed tasks only.
+        """
+        task_ids = set(task_ids)
+        return {
+            task.id: row for row, task in enumerate(self._tasks) if task.id in task_ids
+        }
+
+    def replace_tasks(self, tasks):
+        """
+        Show new versions of displayed tasks, updating only their rows.
+
+        :param tasks: Task records; those whose ID is not displayed are ignored.
+        """
+        tasks = {task.id: task for task in tasks}
+        rows = self.rows_of(tasks)
+        if not rows:
+            return
+        for task_id, row in rows.items():
+            self._tasks[row] = tasks[task_id]
+            self.search_index.add(tasks[task_id])
+        self.dataChanged.emit(
+            self.index(min(rows.values()), 0),
+            self.index(max(rows.values()), len(HEADERS) - 1),
+        )
+
+    def remove_tasks(self, task_ids):
+        """
+        Remove the rows of some tasks, one row range at a time.
+
+        :param task_ids: Iterable of task IDs.
+        :return: Dictionary of task ID to the row it was displayed at.
+        """
+        rows = self.rows_of(task_ids)
+        # Bottom up, so the rows of the remaining ranges do not move
+        ordered = sorted(rows.values(), reverse=True)
+        while ordered:
+            last = first = ordered.pop(0)
+            while ordered and ordered[0] == first - 1:
+                first = ordered.pop(0)
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for task in self._tasks[first : last + 1]:
+                self.search_index.remove(task.id)
+            del self._tasks[first : last + 1]
+            self.endRemoveRows()
+        return rows
+
+    def insert_task(self, row, task):
+        """
+        Insert a task at a row, e.g. to undo remove_tasks().
+
+        :param row: Row to insert at; clamped to the current row count.
+        :param task: The Task record.
+        """
+        row = min(row, len(self._tasks))
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._tasks.insert(row, task)
+        self.search_index.add(task)
+        self.endInsertRows()
+
+    def task_at(self, row):
+        """
+        Return the task displayed at a model row.
+
+        :param row: Row number in this (source) model.
+        """
+        return self._tasks[row]
+
+    def tasks(self):
+        """Return the list of tasks currently in the model."""
+        return self._tasks
+
+
+class TaskFilterProxyModel(QSortFilterProxyModel):
+    """
+    Proxy hiding the tasks whose title and notes do not contain the search text.
+
+    The matching task IDs come from the source model's SearchIndex in one
+    query, and are queried again only when the text or the index changes,
+    so filtering a row is a set lookup.
+    """
+
+    def __init__(self, parent=None):
+        """
+        :param parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self._search_text = ""
+        self._matching_ids = None
+        # Index and index version the matching IDs were computed from
+        self._matched_index = None
+        self._matching_version = None
+
+    def set_search_text(self, text):
+        """
+        Filter the rows by a case-insensitive substring of title or notes.
+
+        :param text: The text to search for; empty shows every row.
+        """
+        if text == self._search_text:
+            return
+        self._search_text = text
+        self._matched_index = None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        """Accept rows whose title or notes contain the search text."""
+        if not self._search_text:
+            return True
+        return self.sourceModel().task_at(source_row).id in self._matches()
+
+    def _matches(self):
+        """Return the IDs of the tasks matching the search text."""
+        search_index = self.sourceModel().search_index
+        if (
+            self._matched_index is not search_index
+            or self._matching_version != search_index.version
+        ):
+            self._matching_ids = search_index.search(self._search_text)
+            self._matched_index = search_index
+            self._matching_version = search_index.version
+        return self._matching_ids
+
+    def task_for_index(self, index):
+        """
+        Return the task displayed at a proxy index.
+
+        :param index: An index of this proxy model.
+        """
+        return self.sourceModel().task_at(self.mapToSource(index).row())
+
+
+class HighlightDelegate(QStyledItemDelegate):
+    """
+    Item delegate drawing search highlights with the matched terms in bold.
+
+    Cells without a HIGHLIGHT_ROLE value are drawn as usual.
+    """
+
+    def paint(self, painter, option, index):
+        """Draw the highlight of the cell as rich text, if it has one."""
+        highlight = index.data(HIGHLIGHT_ROLE)
+        if not highlight:
+            super().paint(painter, option, index)
+            return
+
+        self.initStyleOption(option, index)
+        style = option.widget.style() if option.widget else QApplication.style()
+        option.text = ""
+        style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+
+        text_rect = style.subElementRect(
+            QStyle.SE_ItemViewItemText, option, option.widget
+        )
+        document = QTextDocument()
+        document.setDefaultFont(option.font)
+        document.setDocumentMargin(0)
+        document.setHtml(highlight_html(highlight))
+        context = QAbstractTextDocumentLayout.PaintContext()
+        if option.state & QStyle.State_Selected:
+            context.palette.setColor(
+                QPalette.Text, option.palette.color(QPalette.HighlightedText)
+            )
+        else:
+            context.palette.setColor(QPalette.Text, option.palette.color(QPalette.Text))
+
+        painter.save()
+        painter.setClipRect(text_rect)
+        # Center the single line of text vertically in the cell
+        top = text_rect.top() + (text_rect.height() - document.size().height()) / 2
+        painter.translate(text_rect.left(), top)
+        document.documentLayout().draw(painter, context)
+        painter.restore()
+
+
+def highlight_html(highlight):
+    """
+    Convert a search highlight into HTML with the matched terms in bold.
+
+    :param highlight: Text with matches between HIGHLIGHT_START and HIGHLIGHT_END.
+    """
+    return (
+        "<span style='white-space: pre'>"
+        + html.escape(highlight)
+        .replace(HIGHLIGHT_START, "<b>")
+        .replace(HIGHLIGHT_END, "</b>")
+        + "</span>"
+    )
@@ -0,0 +1,351 @@
+"""A small Google Tasks API v1 client over one pooled keep-alive HTTP session."""
+
+import email
+import json
+import threading
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+import requests
+from google.auth.transport.requests import AuthorizedSession, Request
+
+from http_pool import FETCH_CONCURRENCY
+
+API_ROOT = "https://tasks.googleapis.com"
+BATCH_URL = f"{API_ROOT}/batch"
+
+# Seconds to wait for the API before giving up on a request
+REQUEST_TIMEOUT = 30
+
+# Google APIs only compress responses for clients announcing gzip in both
+# headers
+COMPRESSION_HEADERS = {
+    "Accept-Encoding": "gzip",
+    "User-Agent": "xbitodowin (gzip)",
+}
+
+
+class ApiRequest(NamedTuple):
+    """A Tasks API call, executed alone or as part of a batch."""
+
+    method: str
+    # Path below API_ROOT, e.g. "/tasks/v1/users/@me/lists"
+    path: str
+    params: Optional[Dict[str, Any]] = None
+    body: Optional[Dict[str, Any]] = None
+    headers: Optional[Dict[str, str]] = None
+
+    @property
+    def path_and_query(self) -> str:
+        """The path followed by the encoded query string, if any."""
+        params = {
+            name: str(value).lower() if isinstance(value, bool) else value
+            for name, value in (self.params or {}).items()
+            if value is not None
+        }
+        return f"{self.path}?{urlencode(params)}" if params else self.path
+
+
+class ApiError(Exception):
+    """An error status answered by the Tasks API."""
+
+    def __init__(self, status: int, reason: str, content: bytes = b"", uri=None):
+        """
+        :param status: The HTTP status.
+        :param reason: The HTTP reason phrase.
+        :param content: The response body, usually a JSON error.
+        :param uri: The method and path of the failed request.
+        """
+        super().__init__(status, reason)
+        self.status = status
+        self.reason = reason
+        self.content = content
+        self.uri = uri
+
+    def __str__(self):
+        details = self.content.decode("utf-8", "replace").strip()
+        return (
+            f"<ApiError {self.status} when requesting {self.uri} "
+            f'returned "{self.reason}". Details: "{details}">'
+        )
+
+
+def list_task_lists_request(page_token=None, max_results=100, fields=None):
+    """Build a tasklists.list call."""
+    return ApiRequest(
+        "GET",
+        "/tasks/v1/users/@me/lists",
+        {"maxResults": max_results, "pageToken": page_token, "fields": fields},
+    )
+
+
+def get_task_list_request(task_list_id):
+    """Build a tasklists.get call."""
+    return ApiRequest("GET", f"/tasks/v1/users/@me/lists/{_quote(task_list_id)}")
+
+
+def list_tasks_request(task_list_id, page_token=None, max_results=100, **params):
+    """
+    Build a tasks.list call.
+
+    :param params: Other query parameters, e.g. ``updatedMin``,
+        ``showHidden`` or ``fields``.
+    """
+    return ApiRequest(
+        "GET",
+        f"/tasks/v1/lists/{_quote(task_list_id)}/tasks",
+        {"maxResults": max_results, "pageToken": page_token, **params},
+    )
+
+
+def get_task_request(task_list_id, task_id, fields=None):
+    """Build a tasks.get call."""
+    return ApiRequest(
+        "GET",
+        f"/tasks/v1/lists/{_quote(task_list_id)}/tasks/{_quote(task_id)}",
+        {"fields": fields},
+    )
+
+
+def patch_task_request(task_list_id, task_id, body, fields=None):
+    """Build a tasks.patch call changing the fields in ``body``."""
+    return ApiRequest(
+        "PATCH",
+        f"/tasks/v1/lists/{_quote(task_list_id)}/tasks/{_quote(task_id)}",
+        {"fields": fields},
+        body,
+    )
+
+
+def delete_task_request(task_list_id, task_id):
+    """Build a tasks.delete call."""
+    return ApiRequest(
+        "DELETE", f"/tasks/v1/lists/{_quote(task_list_id)}/tasks/{_quote(task_id)}"
+    )
+
+
+def move_task_request(
+    task_list_id, task_id, destination_task_list_id=None, fields=None
+):
+    """Build a tasks.move call, to another list if a destination is given."""
+    return ApiRequest(
+        "POST",
+        f"/tasks/v1/lists/{_quote(task_list_id)}/tasks/{_quote(task_id)}/move",
+        {"destinationTasklist": destination_task_list_id, "fields": fields},
+    )
+
+
+class TasksClient:
+    """
+    Google Tasks API v1 calls as plain HTTPS requests.
+
+    Every thread shares one AuthorizedSession, whose connection pool keeps
+    up to ``pool_size`` connections alive between calls, so repeated
+    refreshes skip the TCP and TLS handshakes. Responses are gzip
+    compressed. An expired token is refreshed once, under a lock, before
+    threads race to do it. Nothing is loaded until the first call.
+
+    Methods return the decoded JSON response, or None when the API answers
+    without a body (a delete, or 304 Not Modified), and raise ApiError for
+    error statuses and requests.RequestException for network failures.
+    """
+
+    def __init__(self, creds, pool_size=FETCH_CONCURRENCY, timeout=REQUEST_TIMEOUT):
+        """
+        :param creds: The OAuth credentials.
+        :param pool_size: Number of connections kept alive, at least the
+            number of threads calling at the same time.
+        :param timeout: Seconds to wait for the API.
+        """
+        self.creds = creds
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session = None
+        self._auth_request = None
+        self._lock = threading.Lock()
+
+    def list_task_lists(self, page_token=None, etag=None) -> Optional[dict]:
+        """
+        Return a page of the task lists of the user.
+
+        :param page_token: Token of the page, None for the first one.
+        :param etag: Etag of the known page; a page that did not change is
+            then answered with None.
+        """
+        request = list_task_lists_request(page_token)
+        if etag:
+            request = request._replace(headers={"If-None-Match": etag})
+        return self.execute(request)
+
+    def get_task_list(self, task_list_id) -> dict:
+        """Return a task list resource."""
+        return self.execute(get_task_list_request(task_list_id))
+
+    def list_tasks(self, task_list_id, page_token=None, **params) -> dict:
+        """Return a page of the tasks of a list, see list_tasks_request()."""
+        return self.execute(list_tasks_request(task_list_id, page_token, **params))
+
+    def get_task(self, task_list_id, task_id, fields=None) -> dict:
+        """Return a task resource."""
+        return self.execute(get_task_request(task_list_id, task_id, fields))
+
+    def patch_task(self, task_list_id, task_id, body) -> dict:
+        """Change some fields of a task and return the updated task."""
+        return self.execute(patch_task_request(task_list_id, task_id, body))
+
+    def delete_task(self, task_list_id, task_id) -> None:
+        """Delete a task."""
+        return self.execute(delete_task_request(task_list_id, task_id))
+
+    def move_task(self, task_list_id, task_id, destination_task_list_id=None) -> dict:
+        """Move a task, to another list if a destination is given."""
+        return self.execute(
+            move_task_request(task_list_id, task_id, destination_task_list_id)
+        )
+
+    def execute(self, request: ApiRequest) -> Optional[dict]:
+        """
+        Send one API call.
+
+        :param request: The ApiRequest.
+        :return: The decoded JSON response, or None for an empty one.
+        """
+        response = self._send(
+            request.method,
+            API_ROOT + request.path_and_query,
+            json=request.body,
+            headers=request.headers,
+        )
+        if response.status_code == 304:
+            return None
+        if response.status_code >= 400:
+            raise ApiError(
+                response.status_code,
+                response.reason,
+                response.content,
+                f"{request.method} {request.path}",
+            )
+        return response.json() if response.content else None
+
+    def execute_batch(
+        self, requests: List[ApiRequest]
+    ) -> List[Tuple[Optional[dict], Optional[Exception]]]:
+        """
+        Send several API calls in one multipart/mixed round trip.
+
+        :param requests: Up to 1000 ApiRequests; the Tasks API advises 50.
+        :return: List of ``(response, error)`` pairs in request order. The
+            whole batch failing raises instead.
+        """
+        boundary = uuid.uuid4().hex
+        response = self._send(
+            "POST",
+            BATCH_URL,
+            data=_encode_batch(requests, boundary),
+            headers={"Content-Type": f'multipart/mixed; boundary="{boundary}"'},
+        )
+        if response.status_code >= 400:
+            raise ApiError(
+                response.status_code, response.reason, response.content, "POST /batch"
+            )
+        outcomes = [
+            (None, ApiError(502, "Missing batch part", uri="POST /batch"))
+        ] * len(requests)
+        for index, status, reason, content in _decode_batch(
+            response.headers["Content-Type"], response.content
+        ):
+            if index >= len(requests):
+                continue
+            if status >= 400:
+                request = requests[index]
+                uri = f"{request.method} {request.path}"
+                outcomes[index] = (None, ApiError(status, reason, content, uri))
+            else:
+                outcomes[index] = (
+                    json.loads(content) if content.strip() else None,
+                    None,
+                )
+        return outcomes
+
+    def _send(self, method, url, **kwargs):
+        """Send an authorized request on the shared session."""
+        session = self._get_session()
+        if not self.creds.valid:
+            with self._lock:
+                if not self.creds.valid:
+                    self.creds.refresh(self._auth_request)
+        return session.request(method, url, timeout=self.timeout, **kwargs)
+
+    def _get_session(self):
+        """Return the shared session, creating it on first use."""
+        with self._lock:
+            if self._session is None:
+                session = AuthorizedSession(self.creds)
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.pool_size
+                )
+                session.mount("https://", adapter)
+                session.headers.update(COMPRESSION_HEADERS)
+                # Token refreshes use a plain session: going through the
+                # AuthorizedSession would try to authorize the refresh itself
+                self._auth_request = Request()
+                self._session = session
+            return self._session
+
+
+def _quote(value):
+    """Escape an ID for use as a path segment."""
+    return quote(value, safe="")
+
+
+def _encode_batch(requests, boundary):
+    """Serialize API calls as a multipart/mixed batch body."""
+    lines = []
+    for index, request in enumerate(requests):
+        lines += [
+            f"--{boundary}",
+            "Content-Type: application/http",
+            "Content-Transfer-Encoding: binary",
+            f"Content-ID: <item{index}>",
+            "",
+            f"{request.method} {request.path_and_query} HTTP/1.1",
+        ]
+        for name, value in (request.headers or {}).items():
+            lines.append(f"{name}: {value}")
+        if request.body is not None:
+            body = json.dumps(request.body)
+            lines += [
+                "Content-Type: application/json",
+                f"Content-Length: {len(body.encode('utf-8'))}",
+                "",
+                body,
+            ]
+        else:
+            lines.append("")
+        lines.append("")
+    lines.append(f"--{boundary}--")
+    return "\r\n".join(lines).encode("utf-8")
+
+
+def _decode_batch(content_type, content):
+    """
+    Parse a multipart/mixed batch response.
+
+    :return: List of ``(request index, status, reason, body bytes)``.
+    """
+    message = email.message_from_string(
+        f"Content-Type: {content_type}\r\n\r\n" + content.decode("utf-8")
+    )
+    parts = []
+    for part in message.get_payload():
+        # Content-ID is "<response-item{index}>"
+        content_id = part["Content-ID"] or ""
+        index = int(content_id.strip("<>").rsplit("item", 1)[-1])
+        payload = part.get_payload()
+        status_line, _, rest = payload.partition("\n")
+        _, status, reason = (status_line.strip().split(" ", 2) + [""])[:3]
+        response = email.message_from_string(rest)
+        body = response.get_payload()
+        parts.append((index, int(status), reason, body.encode("utf-8")))
+    return parts
@@ -0,0 +1,302 @@
+"""Background execution of blocking calls, with results delivered to the GUI thread."""
+
+import itertools
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+# Most jobs running at the same time. Jobs mostly wait on the network, so
+# this does not depend on the number of CPU cores.
+MAX_THREADS = 8
+
+# Priority of jobs only reading local data, so they do not queue behind API
+# calls, see TaskRunner.run
+LOCAL_PRIORITY = 1
+
+# Priority of jobs nobody waits for, such as warming the cache, so they
+# start after every other waiting job
+PREFETCH_PRIORITY = -1
+
+
+class WorkerSignals(QObject):
+    """Signals a Worker emits from its pool thread, tagged with its job ID."""
+
+    result = Signal(int, object)
+    error = Signal(int, object)
+    progress = Signal(int, object)
+
+
+class Worker(QRunnable):
+    """A QRunnable calling a single function on a pool thread."""
+
+    def __init__(self, job_id, fn, reports_progress=False):
+        """
+        :param job_id: Identifier echoed back with the outcome.
+        :param fn: Callable taking no arguments; it must not touch widgets.
+        :param reports_progress: If True, ``fn`` takes report() instead.
+        """
+        super().__init__()
+        # The runner keeps the worker alive until its outcome is delivered
+        self.setAutoDelete(False)
+        self.job_id = job_id
+        self.fn = fn
+        self.reports_progress = reports_progress
+        self.signals = WorkerSignals()
+
+    def run(self):
+        """Call the function and emit its result or the exception it raised."""
+        try:
+            result = self.fn(self.report) if self.reports_progress else self.fn()
+        except Exception as e:
+            self.signals.error.emit(self.job_id, e)
+        else:
+            self.signals.result.emit(self.job_id, result)
+
+    def report(self, value):
+        """Emit a partial result, delivered before the final one."""
+        self.signals.progress.emit(self.job_id, value)
+
+
+class TaskRunner(QObject):
+    """
+    Runs blocking calls (network, disk) off the GUI thread.
+
+    Jobs are grouped by channel, e.g. "tasks" for whatever fills the task
+    table. Starting a job on a channel supersedes the previous one: if it
+    has not started yet it is dropped from the queue, otherwise its outcome
+    is discarded on arrival. A job given the same key as the channel's
+    current one is the same request, e.g. the two signals of one click, and
+    is merged into it instead. Callbacks always run on the GUI thread.
+    """
+
+    # Emitted when the runner goes from idle to busy and back
+    busy_changed = Signal(bool)
+
+    def __init__(self, parent=None):
+        """
+        :param parent: Optional parent QObject.
+        """
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(MAX_THREADS, self.pool.maxThreadCount()))
+        self._job_ids = itertools.count(1)
+        # Job ID -> (channel, worker, on_result, on_error, on_progress, key)
+        self._jobs = {}
+        # Channel -> ID of the job whose outcome is still wanted
+        self._latest = {}
+
+    def run(
+        self,
+        channel,
+        fn,
+        on_result=None,
+        on_error=None,
+        priority=0,
+        on_progress=None,
+        key=None,
+    ):
+        """
+        Run ``fn`` on a pool thread, superseding the channel's previous job.
+
+        :param channel: Name of the channel the job belongs to.
+        :param fn: Callable taking no arguments; it must not touch widgets.
+        :param on_result: Called on the GUI thread with the return value.
+        :param on_error: Called on the GUI thread with the exception raised.
+            Errors are printed when no handler is given.
+        :param priority: Jobs waiting for a free thread start in decreasing
+            order of priority, e.g. local reads before API calls.
+        :param on_progress: If given, ``fn`` is called with a function
+            reporting partial results, e.g. the pages of a download, and
+            this is called with each of them on the GUI thread, until the
+            job is superseded.
+        :param key: Optional hashable describing the request. If the
+            channel's current job has the same key, no job is started: its
+            outcome goes to these callbacks instead. A job wanting progress
+            only joins one that reports it; otherwise it supersedes it.
+        :return: The job ID.
+        """
+        current_id = self._latest.get(channel)
+        if key is not None and current_id is not None:
+            entry = self._jobs[current_id]
+            if entry[5] == key and (
+                on_progress is None or entry[1].reports_progress
+            ):
+                self._jobs[current_id] = (
+                    *entry[:2],
+                    on_result,
+                    on_error,
+                    on_progress,
+                    key,
+                )
+                return current_id
+
+        was_busy = self.is_busy()
+        self._supersede(channel)
+        job_id = next(self._job_ids)
+        worker = Worker(job_id, fn, reports_progress=on_progress is not None)
+        worker.signals.result.connect(self._on_result)
+        worker.signals.error.connect(self._on_error)
+        worker.signals.progress.connect(self._on_progress)
+        self._jobs[job_id] = (channel, worker, on_result, on_error, on_progress, key)
+        self._latest[channel] = job_id
+        self.pool.start(worker, priority)
+        if not was_busy:
+            self.busy_changed.emit(True)
+        return job_id
+
+    def cancel(self, channel):
+        """
+        Cancel the current job of a channel, if any.
+
+        :param channel: Name of the channel.
+        """
+        if self._supersede(channel) and not self.is_busy():
+            self.busy_changed.emit(False)
+
+    def is_busy(self, channel=None):
+        """
+        Tell whether jobs whose outcome is still wanted are running.
+
+        :param channel: Restrict the check to one channel.
+        """
+        if channel is None:
+            return bool(self._latest)
+        return channel in self._latest
+
+    def _supersede(self, channel):
+        """
+        Stop waiting for the current job of a channel.
+
+        :return: True if the channel had a job.
+        """
+        job_id = self._latest.pop(channel, None)
+        if job_id is None:
+            return False
+        worker = self._jobs[job_id][1]
+        if self.pool.tryTake(worker):
+            # It never started, so no outcome will ever arrive
+            del self._jobs[job_id]
+        return True
+
+    @Slot(int, object)
+    def _on_progress(self, job_id, value):
+        """Deliver a partial result unless the job was superseded."""
+        entry = self._jobs.get(job_id)
+        if (
+            entry is not None
+            and entry[4] is not None
+            and self._latest.get(entry[0]) == job_id
+        ):
+            entry[4](value)
+
+    @Slot(int, object)
+    def _on_result(self, job_id, result):
+        """Deliver a job result unless the job was superseded."""
+        callback = self._complete(job_id, 2)
+        if callback is not None:
+            callback(result)
+
+    @Slot(int, object)
+    def _on_error(self, job_id, error):
+        """Deliver a job error unless the job was superseded."""
+        entry = self._jobs.get(job_id)
+        callback = self._complete(job_id, 3)
+        if callback is not None:
+            callback(error)
+        elif entry is not None:
+            print(f"Error in background job '{entry[0]}': {error}")
+
+    def _complete(self, job_id, callback_index):
+        """
+        Forget a finished job and return the callback to invoke, if any.
+
+        Returns None for superseded jobs and jobs without that callback.
+        """
+        entry = self._jobs.pop(job_id, None)
+        if entry is None:
+            return None
+        channel = entry[0]
+        if self._latest.get(channel) != job_id:
+            return None
+        del self._latest[channel]
+        if not self.is_busy():
+            self.busy_changed.emit(False)
+        return entry[callback_index]
+
+
+class SingleFlight:
+    """
+    Merges concurrent calls for the same key into one.
+
+    The first call runs the function; calls made with the same key from
+    other threads while it runs wait for it and share its return value or
+    exception, along with the partial results it reported, those reported
+    before they joined included. Used so that the same task list is not
+    downloaded twice at once, e.g. by the prefetcher and a click.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Key -> _Flight of the call in progress
+        self._flights = {}
+
+    def run(self, key, fn, on_progress=None):
+        """
+        Call ``fn``, or wait for the call in progress with the same key.
+
+        :param key: Hashable identifying the call.
+        :param fn: Callable taking a function reporting partial results.
+        :param on_progress: Optional callable receiving every partial result.
+        :return: The return value of ``fn``.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if on_progress is not None:
+            flight.listen(on_progress)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(flight.report)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+
+class _Flight:
+    """A call in progress of a SingleFlight."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Held while partial results are handed over, so that every
+        # listener gets each of them exactly once and in order
+        self._lock = threading.Lock()
+        self._reported = []
+        self._listeners = []
+
+    def listen(self, on_progress):
+        """Receive the partial results so far, then the next ones."""
+        with self._lock:
+            for value in self._reported:
+                on_progress(value)
+            self._listeners.append(on_progress)
+
+    def report(self, value):
+        """Hand a partial result to every listener."""
+        with self._lock:
+            self._reported.append(value)
+            for on_progress in self._listeners:
+                on_progress(value)
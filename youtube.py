@@ -1,11 +1,41 @@
 import re
-from googleapiclient.discovery import build
+import threading
 
-# Read the API key from the credentials file
-with open("credentials/youtube.key", "r") as key_file:
-    api_key = key_file.read().strip()
+import httplib2
 
-youtube_api = build("youtube", "v3", developerKey=api_key)
+from google_services import LazyService
+
+# File holding the YouTube Data API key
+API_KEY_PATH = "credentials/youtube.key"
+
+# Maximum number of video IDs accepted by one videos().list() call
+VIDEOS_PER_REQUEST = 50
+
+# The API client, made on first use so importing this module stays cheap
+_youtube_api = None
+_youtube_api_lock = threading.Lock()
+
+# httplib2 is not thread-safe, so each thread gets its own transport
+_thread_local = threading.local()
+
+
+def _http():
+    """Return the calling thread's HTTP transport for YouTube requests."""
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = _thread_local.http = httplib2.Http()
+    return http
+
+
+def youtube_api():
+    """Return the YouTube API service, reading the key on first use."""
+    global _youtube_api
+    with _youtube_api_lock:
+        if _youtube_api is None:
+            with open(API_KEY_PATH, "r") as key_file:
+                api_key = key_file.read().strip()
+            _youtube_api = LazyService("youtube", "v3", developerKey=api_key)
+    return _youtube_api
 
 
 # Extract video ID from URL within text
@@ -23,7 +53,11 @@ def get_video_duration(text):
     if not video_id:
         return "Invalid or missing YouTube URL"
 
-    response = youtube_api.videos().list(part="contentDetails", id=video_id).execute()
+    response = (
+        youtube_api().videos()
+        .list(part="contentDetails", id=video_id)
+        .execute(http=_http())
+    )
 
     if not response["items"]:
         return "Video not found"
@@ -60,15 +94,32 @@ def get_youtube_video_info(text):
     video_id = extract_video_id(text)
     if not video_id:
         return None
+    return get_videos_info([video_id]).get(video_id)
+
+
+def get_videos_info(video_ids):
+    """
+    Fetch the details of several videos in a single videos().list() call.
 
+    :param video_ids: Up to VIDEOS_PER_REQUEST video IDs.
+    :return: Dictionary of video ID to the dictionary described in
+        get_youtube_video_info(). Videos that do not exist are left out.
+    """
     response = (
-        youtube_api.videos().list(part="snippet,contentDetails", id=video_id).execute()
+        youtube_api().videos()
+        .list(
+            part="snippet,contentDetails",
+            id=",".join(video_ids),
+            maxResults=VIDEOS_PER_REQUEST,
+        )
+        .execute(http=_http())
     )
-    items = response.get("items", [])
-    if not items:
-        return None
+    return {item["id"]: _video_info(item) for item in response.get("items", [])}
+
 
-    video_data = items[0]
+def _video_info(video_data):
+    """Convert a video resource into the dictionary of get_youtube_video_info()."""
+    video_id = video_data["id"]
     snippet = video_data.get("snippet", {})
     content_details = video_data.get("contentDetails", {})
     thumbnails = snippet.get("thumbnails", {})
@@ -0,0 +1,147 @@
+"""Persistent cache of YouTube video details, filled in batches."""
+
+import json
+import sqlite3
+import threading
+import time
+
+from db_init import DB_PATH, init_db
+from youtube import VIDEOS_PER_REQUEST, extract_video_id, get_videos_info
+
+# Seconds after which cached video details are fetched again
+YOUTUBE_CACHE_TTL = 7 * 24 * 3600
+
+# Number of videos kept; the least recently used ones are evicted beyond it
+YOUTUBE_CACHE_MAX_ENTRIES = 5000
+
+
+class YouTubeCache:
+    """
+    Video details by video ID, stored in the local database.
+
+    Videos that do not exist are cached too, so they are not looked up again
+    before the TTL expires. The connection is shared between threads and
+    guarded by a lock.
+    """
+
+    def __init__(
+        self, path=DB_PATH, ttl=YOUTUBE_CACHE_TTL, max_entries=YOUTUBE_CACHE_MAX_ENTRIES
+    ):
+        """
+        :param path: Path of the SQLite database file.
+        :param ttl: Seconds after which an entry is stale.
+        :param max_entries: Maximum number of entries kept.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        init_db(self._conn)
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def get_many(self, video_ids):
+        """
+        Return the fresh cached entries of some videos and mark them as used.
+
+        :param video_ids: Iterable of video IDs.
+        :return: Dictionary of video ID to video details, or to None for
+            videos known not to exist. Missing and stale entries are left out.
+        """
+        video_ids = list(video_ids)
+        if not video_ids:
+            return {}
+        now = time.time()
+        placeholders = ", ".join("?" for _ in video_ids)
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT video_id, info FROM youtube_videos "
+                f"WHERE video_id IN ({placeholders}) AND fetched_at >= ?",
+                [*video_ids, now - self.ttl],
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE youtube_videos SET accessed_at = ? WHERE video_id = ?",
+                [(now, video_id) for video_id, _ in rows],
+            )
+        return {
+            video_id: None if info is None else json.loads(info)
+            for video_id, info in rows
+        }
+
+    def put_many(self, entries):
+        """
+        Store video details, evicting the least recently used entries.
+
+        :param entries: Dictionary of video ID to video details, or to None
+            for videos that do not exist.
+        """
+        now = time.time()
+        rows = [
+            (video_id, None if info is None else json.dumps(info), now, now)
+            for video_id, info in entries.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO youtube_videos (video_id, info, fetched_at, accessed_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    info = excluded.info,
+                    fetched_at = excluded.fetched_at,
+                    accessed_at = excluded.accessed_at
+                """,
+                rows,
+            )
+            self._conn.execute(
+                """
+                DELETE FROM youtube_videos WHERE video_id IN (
+                    SELECT video_id FROM youtube_videos
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+
+def lookup_videos(video_ids, video_cache):
+    """
+    Return the details of videos, from the cache or from the YouTube API.
+
+    Videos missing from the cache are fetched VIDEOS_PER_REQUEST at a time,
+    and each batch is cached as soon as it arrives. Runs off the GUI thread.
+
+    :param video_ids: Iterable of video IDs.
+    :param video_cache: The YouTubeCache to read and fill.
+    :return: Dictionary of video ID to video details, or to None for videos
+        that do not exist.
+    """
+    video_ids = list(dict.fromkeys(video_ids))
+    found = video_cache.get_many(video_ids)
+    missing = [video_id for video_id in video_ids if video_id not in found]
+    for start in range(0, len(missing), VIDEOS_PER_REQUEST):
+        chunk = missing[start : start + VIDEOS_PER_REQUEST]
+        infos = get_videos_info(chunk)
+        fetched = {video_id: infos.get(video_id) for video_id in chunk}
+        video_cache.put_many(fetched)
+        found.update(fetched)
+    return found
+
+
+def prefetch_videos(tasks, video_cache):
+    """
+    Warm the cache with the videos linked from the title or notes of tasks.
+
+    :param tasks: Iterable of Task records.
+    :param video_cache: The YouTubeCache to fill.
+    :return: Number of videos found in the tasks.
+    """
+    video_ids = set()
+    for task in tasks:
+        video_id = extract_video_id(task.title + " " + (task.notes or ""))
+        if video_id:
+            video_ids.add(video_id)
+    lookup_videos(video_ids, video_cache)
+    return len(video_ids)